@@ -0,0 +1,41 @@
+"""add driver suspension indexes
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add partial indexes matching the insurance expiry and unsuspension job queries."""
+    # Only drivers that are not yet suspended can have their insurance expire
+    op.create_index(
+        'ix_driver_profiles_insurance_expiry_active',
+        'driver_profiles',
+        ['insurance_expiry'],
+        postgresql_where=sa.text('is_suspended = false')
+    )
+    
+    # Only drivers suspended for cancellations are unsuspended after 24 hours
+    op.create_index(
+        'ix_driver_profiles_cancellation_suspended',
+        'driver_profiles',
+        ['last_cancellation_reset'],
+        postgresql_where=sa.text('is_suspended = true AND cancellation_count >= 3')
+    )
+
+
+def downgrade():
+    """Remove driver suspension indexes."""
+    op.drop_index('ix_driver_profiles_cancellation_suspended', table_name='driver_profiles')
+    op.drop_index('ix_driver_profiles_insurance_expiry_active', table_name='driver_profiles')
@@ -18,6 +18,12 @@ class Settings(BaseSettings):
     # Server
     host: str = Field(default="0.0.0.0", alias="HOST")
     port: int = Field(default=8000, alias="PORT")
+    # permessage-deflate costs CPU and per-connection zlib state for little
+    # gain on the small, frequent location frames, so it is off by default
+    ws_per_message_deflate: bool = Field(default=False, alias="WS_PER_MESSAGE_DEFLATE")
+    # Worker processes; with more than one, WebSocket messages are relayed
+    # between workers over Redis pub/sub
+    web_concurrency: int = Field(default=1, alias="WEB_CONCURRENCY")
     
     # PostgreSQL
     postgres_host: str = Field(default="localhost", alias="POSTGRES_HOST")
@@ -11,6 +11,21 @@ import logging
 from app.config import settings
 from app.routers import auth, location, rides, drivers, websocket, payments, ratings, emergency, scheduled_rides, parcels
 from app.middleware.logging_middleware import RequestLoggingMiddleware
+from app.services.websocket_service import connection_manager
+from app.services.location_service import location_write_batcher
+from app.database import mongodb
+from app.models.location import LOCATIONS_COLLECTION
+from app.utils.request_body import add_json_body_schemas
+from app.schemas.auth import (
+    UserRegistrationRequest,
+    LoginRequest,
+    VerificationSendRequest,
+    VerificationConfirmRequest
+)
+from app.schemas.location import DriverLocationUpdate
+from app.schemas.ride import RideRequestCreate
+from app.schemas.scheduled_ride import ScheduledRideRequest, ScheduledRideUpdate
+from app.schemas.parcel_delivery import ParcelDeliveryRequest
 
 # Configure logging
 logging.basicConfig(
@@ -104,6 +119,48 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
+@app.on_event("startup")
+async def build_request_validators():
+    """Build deferred request schema validators before the first request."""
+    for model in (
+        UserRegistrationRequest,
+        LoginRequest,
+        VerificationSendRequest,
+        VerificationConfirmRequest,
+        DriverLocationUpdate,
+        RideRequestCreate,
+        ScheduledRideRequest,
+        ScheduledRideUpdate,
+        ParcelDeliveryRequest
+    ):
+        model.model_rebuild()
+
+
+@app.on_event("startup")
+async def start_websocket_relay():
+    """Relay WebSocket messages between workers when running more than one."""
+    if settings.web_concurrency > 1:
+        await connection_manager.start_relay(settings.redis_url)
+
+
+@app.on_event("shutdown")
+async def stop_websocket_relay():
+    """Stop the WebSocket relay."""
+    await connection_manager.stop_relay()
+
+
+@app.on_event("startup")
+async def start_location_write_batcher():
+    """Batch driver location log inserts."""
+    location_write_batcher.start(mongodb[LOCATIONS_COLLECTION])
+
+
+@app.on_event("shutdown")
+async def stop_location_write_batcher():
+    """Write any buffered driver locations."""
+    await location_write_batcher.stop()
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(location.router)
@@ -121,6 +178,19 @@ from app.routers.admin import router as admin_router
 app.include_router(admin_router)
 
 
+_default_openapi = app.openapi
+
+
+def openapi():
+    """Generate the OpenAPI document, including json_body request schemas."""
+    if app.openapi_schema is None:
+        add_json_body_schemas(_default_openapi(), app.routes)
+    return app.openapi_schema
+
+
+app.openapi = openapi
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -155,5 +225,7 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        workers=settings.web_concurrency,
+        ws_per_message_deflate=settings.ws_per_message_deflate
     )
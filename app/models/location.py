@@ -4,7 +4,7 @@ Stores driver locations and location history for geospatial queries.
 """
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 
 
 class Coordinates(BaseModel):
@@ -12,7 +12,8 @@ class Coordinates(BaseModel):
     type: str = "Point"
     coordinates: List[float]  # [longitude, latitude]
     
-    @validator('coordinates')
+    @field_validator('coordinates')
+    @classmethod
     def validate_coordinates(cls, v):
         """Validate coordinates format."""
         if len(v) != 2:
@@ -45,6 +46,7 @@ class Location(BaseModel):
     # Human-readable address
     address: Optional[str] = Field(None, description="Human-readable address")
     city: str = Field(default="Indore", description="City name")
+    geohash6: Optional[str] = Field(None, description="6 character geohash of the point")
     
     # Metadata
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="When location was recorded")
@@ -103,6 +105,24 @@ class Location(BaseModel):
             **kwargs
         )
     
+    @classmethod
+    def from_document(cls, doc: dict) -> "Location":
+        """
+        Build a Location from a stored MongoDB document without validation.
+        
+        Stored documents were validated when written, so reads skip
+        re-validating every field of every driver returned.
+        
+        Args:
+            doc: Location document as stored in MongoDB
+            
+        Returns:
+            Location instance
+        """
+        return cls.model_construct(
+            **{**doc, "location": Coordinates.model_construct(**doc["location"])}
+        )
+    
     def get_latitude(self) -> float:
         """Get latitude from coordinates."""
         return self.location.coordinates[1]
@@ -160,6 +180,10 @@ class LocationHistory(BaseModel):
 # MongoDB collection names
 LOCATIONS_COLLECTION = "locations"
 LOCATION_HISTORY_COLLECTION = "location_history"
+# Ride location points, one document per ride per minute
+LOCATION_HISTORY_BUCKETS_COLLECTION = "location_history_buckets"
+# Latest location of each driver, one document per driver
+CURRENT_LOCATIONS_COLLECTION = "current_driver_locations"
 
 
 # MongoDB indexes to create
@@ -187,6 +211,31 @@ LOCATION_INDEXES = [
     }
 ]
 
+CURRENT_LOCATION_INDEXES = [
+    {
+        "keys": [("location", "2dsphere")],
+        "name": "current_location_2dsphere_idx",
+        "background": True
+    },
+    {
+        "keys": [("user_id", 1)],
+        "name": "current_user_id_idx",
+        "unique": True,
+        "background": True
+    },
+    {
+        "keys": [("geohash6", 1), ("status", 1)],
+        "name": "current_geohash6_status_idx",
+        "background": True
+    },
+    {
+        "keys": [("timestamp", -1)],
+        "name": "current_timestamp_idx",
+        "background": True,
+        "expireAfterSeconds": 86400  # Drop drivers with no update for 24 hours
+    }
+]
+
 LOCATION_HISTORY_INDEXES = [
     {
         "keys": [("ride_id", 1)],
@@ -200,3 +249,12 @@ LOCATION_HISTORY_INDEXES = [
         "background": True
     }
 ]
+
+LOCATION_HISTORY_BUCKET_INDEXES = [
+    {
+        "keys": [("ride_id", 1), ("bucket_minute", 1)],
+        "name": "ride_bucket_minute_idx",
+        "unique": True,
+        "background": True
+    }
+]
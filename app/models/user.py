@@ -2,7 +2,7 @@
 User models for the ride-hailing platform.
 Includes User, DriverProfile, and EmergencyContact models.
 """
-from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -98,6 +98,20 @@ class DriverProfile(Base):
     # Relationships
     user = relationship("User", back_populates="driver_profile")
     
+    # Partial indexes for the suspension background jobs
+    __table_args__ = (
+        Index(
+            'ix_driver_profiles_insurance_expiry_active',
+            'insurance_expiry',
+            postgresql_where=text('is_suspended = false')
+        ),
+        Index(
+            'ix_driver_profiles_cancellation_suspended',
+            'last_cancellation_reset',
+            postgresql_where=text('is_suspended = true AND cancellation_count >= 3')
+        ),
+    )
+    
     def __repr__(self):
         return f"<DriverProfile(driver_id={self.driver_id}, status={self.status})>"
 
@@ -128,7 +128,7 @@ async def register_user(
         db.commit()
         db.refresh(new_user)
         
-        return UserRegistrationResponse(
+        return UserRegistrationResponse.model_construct(
             user_id=new_user.user_id,
             phone_number=new_user.phone_number,
             name=new_user.name,
@@ -452,7 +452,7 @@ async def login(
     redis_client.hset(session_key, mapping=session_data)
     redis_client.expire(session_key, expiration_seconds)
     
-    return LoginResponse(
+    return LoginResponse.model_construct(
         access_token=access_token,
         user_id=user.user_id,
         phone_number=user.phone_number,
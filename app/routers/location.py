@@ -16,6 +16,7 @@ from app.schemas.location import (
     LocationValidationResponse
 )
 from app.utils.jwt import get_current_user_dependency as get_current_user
+from app.utils.request_body import json_body
 
 router = APIRouter(
     prefix="/api/location",
@@ -31,8 +32,8 @@ router = APIRouter(
     description="Update driver's current location. Requires driver authentication."
 )
 async def update_driver_location(
-    location_data: DriverLocationUpdate,
     current_user: dict = Depends(get_current_user),
+    location_data: DriverLocationUpdate = Depends(json_body(DriverLocationUpdate)),
     db: AsyncIOMotorDatabase = Depends(get_mongodb)
 ):
     """
@@ -87,7 +88,7 @@ async def update_driver_location(
         accuracy=location_data.accuracy
     )
     
-    return DriverLocationResponse(
+    return DriverLocationResponse.model_construct(
         user_id=location.user_id,
         latitude=location.get_latitude(),
         longitude=location.get_longitude(),
@@ -141,7 +142,7 @@ async def get_driver_location(
             detail=f"Location not found for driver {driver_id}"
         )
     
-    return DriverLocationResponse(
+    return DriverLocationResponse.model_construct(
         user_id=location.user_id,
         latitude=location.get_latitude(),
         longitude=location.get_longitude(),
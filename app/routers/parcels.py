@@ -14,21 +14,27 @@ from app.schemas.parcel_delivery import (
     ParcelDeliveryRequest,
     ParcelPickupConfirmation,
     ParcelDeliveryConfirmation,
-    ParcelDeliveryResponse
+    ParcelDeliveryResponse,
+    StoredLocation
 )
 from app.services.location_service import LocationService, get_location_service
 from app.services.fare_service import calculate_parcel_fare, estimate_delivery_time
+from app.utils.request_body import json_body
 
 
 router = APIRouter(prefix="/api/parcels", tags=["parcels"])
 
 
-@router.post("/request", response_model=ParcelDeliveryResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/request",
+    response_model=ParcelDeliveryResponse,
+    status_code=status.HTTP_201_CREATED
+)
 async def request_parcel_delivery(
-    request: ParcelDeliveryRequest,
     sender_id: str,
     db: Session = Depends(get_db),
-    location_service: LocationService = Depends(get_location_service)
+    location_service: LocationService = Depends(get_location_service),
+    request: ParcelDeliveryRequest = Depends(json_body(ParcelDeliveryRequest))
 ):
     """
     Request a parcel delivery.
@@ -137,14 +143,14 @@ async def request_parcel_delivery(
     db.commit()
     db.refresh(parcel_delivery)
     
-    return ParcelDeliveryResponse(
+    return ParcelDeliveryResponse.model_construct(
         delivery_id=parcel_delivery.delivery_id,
         sender_id=parcel_delivery.sender_id,
         recipient_phone=parcel_delivery.recipient_phone,
         recipient_name=parcel_delivery.recipient_name,
         driver_id=parcel_delivery.driver_id,
-        pickup_location=parcel_delivery.pickup_location,
-        delivery_location=parcel_delivery.delivery_location,
+        pickup_location=StoredLocation.model_construct(**parcel_delivery.pickup_location),
+        delivery_location=StoredLocation.model_construct(**parcel_delivery.delivery_location),
         parcel_size=parcel_delivery.parcel_size.value,
         weight_kg=parcel_delivery.weight_kg,
         description=parcel_delivery.description,
@@ -374,14 +380,14 @@ async def get_parcel_history(
         )
     
     return [
-        ParcelDeliveryResponse(
+        ParcelDeliveryResponse.model_construct(
             delivery_id=parcel.delivery_id,
             sender_id=parcel.sender_id,
             recipient_phone=parcel.recipient_phone,
             recipient_name=parcel.recipient_name,
             driver_id=parcel.driver_id,
-            pickup_location=parcel.pickup_location,
-            delivery_location=parcel.delivery_location,
+            pickup_location=StoredLocation.model_construct(**parcel.pickup_location),
+            delivery_location=StoredLocation.model_construct(**parcel.delivery_location),
             parcel_size=parcel.parcel_size.value,
             weight_kg=parcel.weight_kg,
             description=parcel.description,
@@ -419,14 +425,14 @@ async def get_parcel_details(
             detail="Parcel delivery not found"
         )
     
-    return ParcelDeliveryResponse(
+    return ParcelDeliveryResponse.model_construct(
         delivery_id=parcel.delivery_id,
         sender_id=parcel.sender_id,
         recipient_phone=parcel.recipient_phone,
         recipient_name=parcel.recipient_name,
         driver_id=parcel.driver_id,
-        pickup_location=parcel.pickup_location,
-        delivery_location=parcel.delivery_location,
+        pickup_location=StoredLocation.model_construct(**parcel.pickup_location),
+        delivery_location=StoredLocation.model_construct(**parcel.delivery_location),
         parcel_size=parcel.parcel_size.value,
         weight_kg=parcel.weight_kg,
         description=parcel.description,
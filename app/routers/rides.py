@@ -6,6 +6,7 @@ Requirements: 2.1, 2.2, 2.4, 2.5
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime
 from typing import Optional
@@ -19,6 +20,8 @@ from app.schemas.ride import (
     RideHistoryResponse,
     RideHistoryItem,
     RideDetailsResponse,
+    RideFareBreakdown,
+    StoredLocation,
     ErrorResponse
 )
 from app.models.ride import Ride, RideStatus, PaymentStatus
@@ -26,12 +29,17 @@ from app.services.location_service import LocationService
 from app.services.fare_service import calculate_estimated_fare
 from app.services.ride_service import start_ride, complete_ride, get_ride_status, cancel_ride
 from app.utils.jwt import get_current_user_dependency
+from app.utils.request_body import json_body
+from app.utils.responses import PydanticJSONResponse
 
 router = APIRouter(
     prefix="/api/rides",
     tags=["rides"]
 )
 
+# Validator for ride history items, built once per process
+_RIDE_HISTORY_ITEMS = TypeAdapter(list[RideHistoryItem])
+
 
 @router.post(
     "/request",
@@ -43,10 +51,10 @@ router = APIRouter(
     }
 )
 async def create_ride_request(
-    ride_request: RideRequestCreate,
     db: Session = Depends(get_db),
     mongodb: AsyncIOMotorDatabase = Depends(get_mongodb),
-    current_user: dict = Depends(get_current_user_dependency)
+    current_user: dict = Depends(get_current_user_dependency),
+    ride_request: RideRequestCreate = Depends(json_body(RideRequestCreate))
 ):
     """
     Create a new ride request.
@@ -187,18 +195,18 @@ async def create_ride_request(
     estimated_arrival_minutes = 10 + int(distance_km * 2)
     
     # Prepare response
-    response = RideRequestResponse(
+    response = RideRequestResponse.model_construct(
         request_id=ride_id,
         estimated_fare=fare_calculation.total_fare,
         estimated_arrival=estimated_arrival_minutes,
-        fare_breakdown=FareBreakdownResponse(
+        fare_breakdown=FareBreakdownResponse.model_construct(
             base=fare_calculation.base_fare,
             per_km=fare_calculation.breakdown.per_km,
             distance=distance_km,
             surge=fare_calculation.surge_multiplier
         ),
-        pickup_location=pickup_location_dict,
-        destination=destination_dict,
+        pickup_location=ride_request.pickup_location,
+        destination=ride_request.destination,
         requested_at=ride.requested_at,
         status=ride.status.value,
         message="Ride request created successfully"
@@ -448,6 +456,7 @@ async def get_ride_status_endpoint(
 @router.get(
     "/history",
     response_model=RideHistoryResponse,
+    response_class=PydanticJSONResponse,
     status_code=status.HTTP_200_OK,
     responses={
         401: {"description": "Unauthorized"}
@@ -507,7 +516,7 @@ async def get_ride_history(
     rides = query.all()
     
     # Build response with required fields (Requirement 9.3)
-    ride_items = []
+    ride_rows = []
     for ride in rides:
         # Determine which rating to show based on user type
         if user_type == "rider":
@@ -523,19 +532,22 @@ async def get_ride_history(
         # Use final_fare if available, otherwise use estimated_fare
         fare = ride.final_fare if ride.final_fare is not None else ride.estimated_fare
         
-        ride_item = RideHistoryItem(
-            ride_id=ride.ride_id,
-            date=ride_date,
-            pickup_location=ride.pickup_location,
-            destination=ride.destination,
-            fare=fare,
-            status=ride.status.value,
-            driver_rating=ride.driver_rating if user_type == "rider" else None,
-            rider_rating=ride.rider_rating if user_type == "driver" else None
-        )
-        ride_items.append(ride_item)
+        ride_rows.append({
+            "ride_id": ride.ride_id,
+            "date": ride_date,
+            "pickup_location": ride.pickup_location,
+            "destination": ride.destination,
+            "fare": fare,
+            "status": ride.status.value,
+            "driver_rating": ride.driver_rating if user_type == "rider" else None,
+            "rider_rating": ride.rider_rating if user_type == "driver" else None
+        })
+    
+    # Validating the whole list in one pydantic-core call is several times
+    # faster than constructing each item and its locations from Python
+    ride_items = _RIDE_HISTORY_ITEMS.validate_python(ride_rows)
     
-    return RideHistoryResponse(
+    return RideHistoryResponse.model_construct(
         rides=ride_items,
         total=len(ride_items)
     )
@@ -544,6 +556,7 @@ async def get_ride_history(
 @router.get(
     "/{ride_id}",
     response_model=RideDetailsResponse,
+    response_class=PydanticJSONResponse,
     status_code=status.HTTP_200_OK,
     responses={
         404: {"description": "Ride not found"},
@@ -596,13 +609,13 @@ async def get_ride_details(
         )
     
     # Build detailed response (Requirement 9.5)
-    response = RideDetailsResponse(
+    response = RideDetailsResponse.model_construct(
         ride_id=ride.ride_id,
         rider_id=ride.rider_id,
         driver_id=ride.driver_id,
         status=ride.status.value,
-        pickup_location=ride.pickup_location,
-        destination=ride.destination,
+        pickup_location=StoredLocation.model_construct(**ride.pickup_location),
+        destination=StoredLocation.model_construct(**ride.destination),
         actual_route=ride.actual_route,
         requested_at=ride.requested_at,
         matched_at=ride.matched_at,
@@ -611,7 +624,7 @@ async def get_ride_details(
         completed_at=ride.completed_at,
         estimated_fare=ride.estimated_fare,
         final_fare=ride.final_fare,
-        fare_breakdown=ride.fare_breakdown,
+        fare_breakdown=RideFareBreakdown.model_construct(**ride.fare_breakdown),
         payment_status=ride.payment_status.value,
         transaction_id=ride.transaction_id,
         rider_rating=ride.rider_rating,
@@ -796,10 +809,11 @@ async def get_ride_receipt(
     y -= 0.3 * inch
     
     p.setFont("Helvetica", 12)
-    p.drawString(1 * inch, y, f"Pickup: {pickup.get('address', 'N/A')}")
+    # Address is optional on ride requests, so it may be missing or None
+    p.drawString(1 * inch, y, f"Pickup: {pickup.get('address') or 'N/A'}")
     y -= 0.3 * inch
     
-    p.drawString(1 * inch, y, f"Destination: {destination.get('address', 'N/A')}")
+    p.drawString(1 * inch, y, f"Destination: {destination.get('address') or 'N/A'}")
     y -= 0.5 * inch
     
     # Fare breakdown
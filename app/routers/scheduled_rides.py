@@ -13,22 +13,29 @@ from app.models.user import User
 from app.schemas.scheduled_ride import (
     ScheduledRideRequest,
     ScheduledRideUpdate,
-    ScheduledRideResponse
+    ScheduledRideResponse,
+    StoredLocation,
+    FareBreakdownSchema
 )
 from app.services.location_service import LocationService, get_location_service
 from app.services.fare_service import calculate_estimated_fare
+from app.utils.request_body import json_body
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 
 router = APIRouter(prefix="/api/rides/scheduled", tags=["scheduled-rides"])
 
 
-@router.post("", response_model=ScheduledRideResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=ScheduledRideResponse,
+    status_code=status.HTTP_201_CREATED
+)
 async def create_scheduled_ride(
-    request: ScheduledRideRequest,
     rider_id: str,
     db: Session = Depends(get_db),
-    location_service: LocationService = Depends(get_location_service)
+    location_service: LocationService = Depends(get_location_service),
+    request: ScheduledRideRequest = Depends(json_body(ScheduledRideRequest))
 ):
     """
     Create a scheduled ride for future pickup.
@@ -134,15 +141,15 @@ async def create_scheduled_ride(
     db.commit()
     db.refresh(scheduled_ride)
     
-    return ScheduledRideResponse(
+    return ScheduledRideResponse.model_construct(
         ride_id=scheduled_ride.ride_id,
         rider_id=scheduled_ride.rider_id,
         driver_id=scheduled_ride.driver_id,
-        pickup_location=scheduled_ride.pickup_location,
-        destination=scheduled_ride.destination,
+        pickup_location=StoredLocation.model_construct(**scheduled_ride.pickup_location),
+        destination=StoredLocation.model_construct(**scheduled_ride.destination),
         scheduled_pickup_time=scheduled_ride.scheduled_pickup_time,
         estimated_fare=scheduled_ride.estimated_fare,
-        fare_breakdown=scheduled_ride.fare_breakdown,
+        fare_breakdown=FareBreakdownSchema.model_construct(**scheduled_ride.fare_breakdown),
         status=scheduled_ride.status.value,
         created_at=scheduled_ride.created_at,
         modified_at=scheduled_ride.modified_at,
@@ -174,15 +181,15 @@ async def get_scheduled_rides(
     scheduled_rides = query.all()
     
     return [
-        ScheduledRideResponse(
+        ScheduledRideResponse.model_construct(
             ride_id=ride.ride_id,
             rider_id=ride.rider_id,
             driver_id=ride.driver_id,
-            pickup_location=ride.pickup_location,
-            destination=ride.destination,
+            pickup_location=StoredLocation.model_construct(**ride.pickup_location),
+            destination=StoredLocation.model_construct(**ride.destination),
             scheduled_pickup_time=ride.scheduled_pickup_time,
             estimated_fare=ride.estimated_fare,
-            fare_breakdown=ride.fare_breakdown,
+            fare_breakdown=FareBreakdownSchema.model_construct(**ride.fare_breakdown),
             status=ride.status.value,
             created_at=ride.created_at,
             modified_at=ride.modified_at,
@@ -208,15 +215,15 @@ async def get_scheduled_ride_details(
             detail="Scheduled ride not found"
         )
     
-    return ScheduledRideResponse(
+    return ScheduledRideResponse.model_construct(
         ride_id=scheduled_ride.ride_id,
         rider_id=scheduled_ride.rider_id,
         driver_id=scheduled_ride.driver_id,
-        pickup_location=scheduled_ride.pickup_location,
-        destination=scheduled_ride.destination,
+        pickup_location=StoredLocation.model_construct(**scheduled_ride.pickup_location),
+        destination=StoredLocation.model_construct(**scheduled_ride.destination),
         scheduled_pickup_time=scheduled_ride.scheduled_pickup_time,
         estimated_fare=scheduled_ride.estimated_fare,
-        fare_breakdown=scheduled_ride.fare_breakdown,
+        fare_breakdown=FareBreakdownSchema.model_construct(**scheduled_ride.fare_breakdown),
         status=scheduled_ride.status.value,
         created_at=scheduled_ride.created_at,
         modified_at=scheduled_ride.modified_at,
@@ -359,15 +366,15 @@ async def modify_scheduled_ride(
     db.commit()
     db.refresh(scheduled_ride)
     
-    return ScheduledRideResponse(
+    return ScheduledRideResponse.model_construct(
         ride_id=scheduled_ride.ride_id,
         rider_id=scheduled_ride.rider_id,
         driver_id=scheduled_ride.driver_id,
-        pickup_location=scheduled_ride.pickup_location,
-        destination=scheduled_ride.destination,
+        pickup_location=StoredLocation.model_construct(**scheduled_ride.pickup_location),
+        destination=StoredLocation.model_construct(**scheduled_ride.destination),
         scheduled_pickup_time=scheduled_ride.scheduled_pickup_time,
         estimated_fare=scheduled_ride.estimated_fare,
-        fare_breakdown=scheduled_ride.fare_breakdown,
+        fare_breakdown=FareBreakdownSchema.model_construct(**scheduled_ride.fare_breakdown),
         status=scheduled_ride.status.value,
         created_at=scheduled_ride.created_at,
         modified_at=scheduled_ride.modified_at,
@@ -5,17 +5,424 @@ Handles WebSocket connections with JWT authentication.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
 from fastapi.exceptions import WebSocketException
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
 from typing import Optional
 from datetime import datetime
+import asyncio
 import logging
-import json
-from app.services.websocket_service import connection_manager
+import math
+import msgpack
+from app.database import get_db, get_mongodb, get_redis
+from app.models.ride import Ride
+from app.schemas.websocket import (
+    WebSocketMessage,
+    PingMessage,
+    LocationUpdateMessage,
+    RideAcceptMessage,
+    RideRejectMessage
+)
+from app.services.location_service import LocationService, calculate_distance
+from app.services.matching_service import MatchingService
+from app.services.websocket_service import connection_manager, MSGPACK_SUBPROTOCOL
 from app.utils.jwt import decode_access_token
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
+# Proximity threshold (500m) as a squared angular distance on the unit sphere,
+# so the arriving-driver check needs neither sqrt nor the full haversine
+_R2_500M = (500 / 6_371_000) ** 2
+
+
+async def _handle_ping(
+    websocket: WebSocket,
+    user_id: str,
+    message_data: dict,
+    now_iso: str
+):
+    """Respond to a client ping with a pong."""
+    ping = PingMessage.model_validate(message_data)
+    await connection_manager.send_message(websocket, user_id, {
+        "type": "pong",
+        "data": {"timestamp": ping.timestamp}
+    })
+
+
+def _find_active_ride(db: Session, ride_id: str, driver_id: str) -> Optional[Ride]:
+    """Get the driver's ride if it is still active."""
+    return db.query(Ride).filter(
+        Ride.ride_id == ride_id,
+        Ride.driver_id == driver_id,
+        Ride.status.in_(["matched", "driver_arriving", "in_progress"])
+    ).first()
+
+
+async def _relay_location_to_rider(
+    ride: Ride,
+    driver_id: str,
+    latitude: float,
+    longitude: float,
+    accuracy: Optional[float],
+    location_timestamp: str,
+    now_iso: str
+):
+    """Send a driver location update to the rider, plus a proximity notice when close."""
+    ride_id = ride.ride_id
+    
+    # Broadcast location to rider
+    rider_location_update = {
+        "type": "driver_location_update",
+        "data": {
+            "ride_id": ride_id,
+            "driver_id": driver_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "accuracy": accuracy,
+            "timestamp": location_timestamp
+        },
+        "timestamp": now_iso
+    }
+    await connection_manager.send_personal_message(
+        rider_location_update,
+        ride.rider_id
+    )
+    
+    logger.debug(f"Location update broadcast to rider {ride.rider_id}")
+    
+    # Check proximity to pickup location if driver is arriving
+    if ride.status != "driver_arriving":
+        return
+    
+    # Extract pickup coordinates from JSON
+    pickup_lat = ride.pickup_location.get("latitude")
+    pickup_lon = ride.pickup_location.get("longitude")
+    if not (pickup_lat and pickup_lon):
+        return
+    
+    # Cheap equirectangular pretest against the 500m radius
+    dlat = math.radians(latitude - pickup_lat)
+    dlon = math.radians(longitude - pickup_lon) * math.cos(
+        math.radians((latitude + pickup_lat) * 0.5)
+    )
+    
+    # If within 500m, send proximity notification
+    if dlat * dlat + dlon * dlon <= _R2_500M:
+        # Precise distance only when notifying the rider
+        distance_meters = calculate_distance(
+            latitude, longitude,
+            pickup_lat, pickup_lon
+        ) * 1000
+        
+        proximity_notification = {
+            "type": "driver_nearby",
+            "data": {
+                "ride_id": ride_id,
+                "driver_id": driver_id,
+                "distance_meters": round(distance_meters, 2),
+                "message": "Your driver is nearby and will arrive soon"
+            },
+            "timestamp": now_iso
+        }
+        await connection_manager.send_personal_message(
+            proximity_notification,
+            ride.rider_id
+        )
+        
+        logger.info(f"Proximity notification sent to rider {ride.rider_id}: {distance_meters}m")
+
+
+async def _handle_driver_location_update(
+    websocket: WebSocket,
+    user_id: str,
+    message_data: dict,
+    now_iso: str
+):
+    """Store a driver location update and relay it to the rider of an active ride."""
+    try:
+        location_update = LocationUpdateMessage.model_validate(message_data)
+    except ValidationError:
+        await connection_manager.send_message(websocket, user_id, {
+            "type": "error",
+            "data": {
+                "message": "Missing latitude or longitude in location update"
+            }
+        })
+        return
+
+    latitude = location_update.latitude
+    longitude = location_update.longitude
+    accuracy = location_update.accuracy
+    ride_id = location_update.ride_id
+
+    logger.debug(f"Driver {user_id} location update: lat={latitude}, lon={longitude}")
+
+    # Get MongoDB database
+    mongodb = get_mongodb()
+    location_service = LocationService(mongodb)
+
+    try:
+        # Store location in MongoDB while the active ride is looked up
+        store_location = location_service.update_driver_location(
+            driver_id=user_id,
+            latitude=latitude,
+            longitude=longitude,
+            accuracy=accuracy
+        )
+        if ride_id:
+            db = next(get_db())
+            try:
+                location, ride = await asyncio.gather(
+                    store_location,
+                    asyncio.to_thread(_find_active_ride, db, ride_id, user_id)
+                )
+            finally:
+                db.close()
+        else:
+            location, ride = await store_location, None
+
+        location_timestamp = location.timestamp.isoformat()
+
+        # Send acknowledgment to driver
+        send_ack = connection_manager.send_message(websocket, user_id, {
+            "type": "location_update_ack",
+            "data": {
+                "received": True,
+                "timestamp": location_timestamp
+            }
+        })
+
+        # If driver has an active ride, broadcast location to rider alongside the ack
+        if ride:
+            await asyncio.gather(
+                send_ack,
+                _relay_location_to_rider(
+                    ride, user_id, latitude, longitude, accuracy,
+                    location_timestamp, now_iso
+                )
+            )
+        else:
+            await send_ack
+
+    except Exception as e:
+        logger.error(f"Error processing location update: {e}")
+        await connection_manager.send_message(websocket, user_id, {
+            "type": "error",
+            "data": {
+                "message": f"Error processing location update: {str(e)}"
+            }
+        })
+
+
+async def _handle_ride_accept(
+    websocket: WebSocket,
+    user_id: str,
+    message_data: dict,
+    now_iso: str
+):
+    """Attempt to match a ride to the accepting driver and notify the parties."""
+    try:
+        ride_accept = RideAcceptMessage.model_validate(message_data)
+    except ValidationError:
+        await connection_manager.send_message(websocket, user_id, {
+            "type": "error",
+            "data": {
+                "message": "Missing ride_id or rider_id in ride_accept message"
+            }
+        })
+        return
+
+    ride_id = ride_accept.ride_id
+    rider_id = ride_accept.rider_id
+
+    logger.info(f"Driver {user_id} accepting ride: {ride_id}")
+
+    # Get database session and Redis client
+    db = next(get_db())
+    redis_client = get_redis()
+
+    try:
+        # Create matching service instance
+        matching_service = MatchingService(redis_client, db)
+
+        # Attempt to match the ride
+        match_result = matching_service.match_ride(
+            ride_id=ride_id,
+            driver_id=user_id,
+            rider_id=rider_id
+        )
+
+        # Send result back to driver
+        match match_result["status"]:
+            case "success":
+                # Send success confirmation to driver
+                await connection_manager.send_message(websocket, user_id, {
+                    "type": "ride_match_confirmed",
+                    "data": match_result
+                })
+
+                # Send match notification to rider
+                rider_notification = {
+                    "type": "ride_matched",
+                    "data": {
+                        "ride_id": ride_id,
+                        "driver_id": user_id,
+                        "driver_details": match_result.get("driver_details"),
+                        "vehicle_details": match_result.get("vehicle_details"),
+                        "estimated_arrival_minutes": match_result.get("estimated_arrival_minutes"),
+                        "distance_to_pickup_km": match_result.get("distance_to_pickup_km"),
+                        "matched_at": match_result.get("matched_at")
+                    },
+                    "timestamp": now_iso
+                }
+                await connection_manager.send_personal_message(rider_notification, rider_id)
+
+                # Cancel notifications to other drivers
+                broadcast_details = matching_service.get_broadcast_details(ride_id)
+                if broadcast_details:
+                    notified_drivers = broadcast_details.get("notified_drivers", [])
+                    cancellation_message = {
+                        "type": "ride_no_longer_available",
+                        "data": {
+                            "ride_id": ride_id,
+                            "reason": "Ride has been matched to another driver"
+                        },
+                        "timestamp": now_iso
+                    }
+
+                    # Send cancellation to all notified drivers except the matched one;
+                    # the message is encoded once and the sends run concurrently
+                    await connection_manager.send_to_many(
+                        cancellation_message,
+                        (driver_id for driver_id in notified_drivers if driver_id != user_id)
+                    )
+
+                logger.info(f"Ride {ride_id} successfully matched to driver {user_id}")
+
+            case "already_matched":
+                # Ride already matched to another driver
+                await connection_manager.send_message(websocket, user_id, {
+                    "type": "ride_match_failed",
+                    "data": {
+                        "ride_id": ride_id,
+                        "reason": "already_matched",
+                        "message": match_result.get("message")
+                    }
+                })
+
+            case "processing":
+                # Another driver is being processed
+                await connection_manager.send_message(websocket, user_id, {
+                    "type": "ride_match_processing",
+                    "data": {
+                        "ride_id": ride_id,
+                        "message": match_result.get("message")
+                    }
+                })
+
+            case _:
+                # Other error
+                await connection_manager.send_message(websocket, user_id, {
+                    "type": "ride_match_failed",
+                    "data": {
+                        "ride_id": ride_id,
+                        "reason": "error",
+                        "message": match_result.get("message")
+                    }
+                })
+
+    except Exception as e:
+        logger.error(f"Error processing ride acceptance: {e}")
+        await connection_manager.send_message(websocket, user_id, {
+            "type": "error",
+            "data": {
+                "message": f"Error processing ride acceptance: {str(e)}"
+            }
+        })
+    
+    finally:
+        db.close()
+
+
+async def _handle_ride_reject(
+    websocket: WebSocket,
+    user_id: str,
+    message_data: dict,
+    now_iso: str
+):
+    """Record a driver rejecting a ride."""
+    try:
+        ride_reject = RideRejectMessage.model_validate(message_data)
+    except ValidationError:
+        await connection_manager.send_message(websocket, user_id, {
+            "type": "error",
+            "data": {
+                "message": "Missing ride_id in ride_reject message"
+            }
+        })
+        return
+
+    ride_id = ride_reject.ride_id
+
+    logger.info(f"Driver {user_id} rejecting ride: {ride_id}")
+
+    # Get database session and Redis client
+    db = next(get_db())
+    redis_client = get_redis()
+
+    try:
+        # Create matching service instance
+        matching_service = MatchingService(redis_client, db)
+
+        # Record the rejection
+        reject_result = matching_service.reject_ride(
+            ride_id=ride_id,
+            driver_id=user_id
+        )
+
+        # Send result back to driver
+        if reject_result["status"] == "success":
+            await connection_manager.send_message(websocket, user_id, {
+                "type": "ride_reject_confirmed",
+                "data": {
+                    "ride_id": ride_id,
+                    "message": "Ride rejection recorded"
+                }
+            })
+
+            logger.info(f"Driver {user_id} rejection of ride {ride_id} recorded")
+
+        else:
+            await connection_manager.send_message(websocket, user_id, {
+                "type": "ride_reject_failed",
+                "data": {
+                    "ride_id": ride_id,
+                    "message": reject_result.get("message")
+                }
+            })
+
+    except Exception as e:
+        logger.error(f"Error processing ride rejection: {e}")
+        await connection_manager.send_message(websocket, user_id, {
+            "type": "error",
+            "data": {
+                "message": f"Error processing ride rejection: {str(e)}"
+            }
+        })
+    
+    finally:
+        db.close()
+
+
+# Inbound message type -> handler, built once at import
+_HANDLERS = {
+    "ping": _handle_ping,
+    "driver_location_update": _handle_driver_location_update,
+    "ride_accept": _handle_ride_accept,
+    "ride_reject": _handle_ride_reject,
+}
+
 
 @router.websocket("")
 async def websocket_endpoint(
@@ -49,6 +456,9 @@ async def websocket_endpoint(
             "data": {...},
             "timestamp": "ISO 8601 timestamp"
         }
+    
+    Clients that request the "msgpack-v1" subprotocol exchange the same
+    messages as MessagePack binary frames instead of JSON text frames.
     """
     # Validate token before accepting connection
     if not token:
@@ -79,11 +489,16 @@ async def websocket_endpoint(
                 reason="Invalid authentication token"
             )
         
+        # Negotiate MessagePack framing if the client asked for it
+        subprotocol = None
+        if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+            subprotocol = MSGPACK_SUBPROTOCOL
+        
         # Accept connection and register in manager
-        await connection_manager.connect(websocket, user_id, user_type)
+        await connection_manager.connect(websocket, user_id, user_type, subprotocol)
         
         # Send connection confirmation
-        await websocket.send_json({
+        await connection_manager.send_message(websocket, user_id, {
             "type": "connection_established",
             "data": {
                 "user_id": user_id,
@@ -95,357 +510,58 @@ async def websocket_endpoint(
         try:
             # Listen for messages from client
             while True:
-                # Receive message from client
-                data = await websocket.receive_text()
-                
                 try:
-                    message = json.loads(data)
-                    message_type = message.get("type")
-                    message_data = message.get("data", {})
-                    
-                    logger.debug(f"Received message from {user_id}: type={message_type}")
-                    
-                    # Handle different message types
-                    if message_type == "ping":
-                        # Respond to ping with pong
-                        await websocket.send_json({
-                            "type": "pong",
-                            "data": {"timestamp": message_data.get("timestamp")}
-                        })
-                    
-                    elif message_type == "driver_location_update":
-                        # Driver sending location update
-                        latitude = message_data.get("latitude")
-                        longitude = message_data.get("longitude")
-                        accuracy = message_data.get("accuracy")
-                        ride_id = message_data.get("ride_id")
-                        
-                        if latitude is None or longitude is None:
-                            await websocket.send_json({
-                                "type": "error",
-                                "data": {
-                                    "message": "Missing latitude or longitude in location update"
-                                }
-                            })
-                            continue
-                        
-                        logger.debug(f"Driver {user_id} location update: lat={latitude}, lon={longitude}")
-                        
-                        # Import here to avoid circular dependency
-                        from app.config import get_mongodb
-                        from app.services.location_service import LocationService
-                        from app.database import get_db
-                        from app.models.ride import Ride
-                        
-                        # Get MongoDB database
-                        mongodb = get_mongodb()
-                        location_service = LocationService(mongodb)
-                        
+                    # Receive message from client and validate the envelope
+                    if connection_manager.uses_msgpack(user_id):
+                        data = await websocket.receive_bytes()
                         try:
-                            # Store location in MongoDB
-                            location = await location_service.update_driver_location(
-                                driver_id=user_id,
-                                latitude=latitude,
-                                longitude=longitude,
-                                accuracy=accuracy
-                            )
-                            
-                            # Send acknowledgment to driver
-                            await websocket.send_json({
-                                "type": "location_update_ack",
-                                "data": {
-                                    "received": True,
-                                    "timestamp": location.timestamp.isoformat()
-                                }
-                            })
-                            
-                            # If driver has an active ride, broadcast location to rider
-                            if ride_id:
-                                db = next(get_db())
-                                try:
-                                    # Get ride details to find rider
-                                    ride = db.query(Ride).filter(
-                                        Ride.ride_id == ride_id,
-                                        Ride.driver_id == user_id,
-                                        Ride.status.in_(["matched", "driver_arriving", "in_progress"])
-                                    ).first()
-                                    
-                                    if ride:
-                                        # Broadcast location to rider
-                                        rider_location_update = {
-                                            "type": "driver_location_update",
-                                            "data": {
-                                                "ride_id": ride_id,
-                                                "driver_id": user_id,
-                                                "latitude": latitude,
-                                                "longitude": longitude,
-                                                "accuracy": accuracy,
-                                                "timestamp": location.timestamp.isoformat()
-                                            },
-                                            "timestamp": datetime.utcnow().isoformat()
-                                        }
-                                        await connection_manager.send_personal_message(
-                                            rider_location_update,
-                                            ride.rider_id
-                                        )
-                                        
-                                        logger.debug(f"Location update broadcast to rider {ride.rider_id}")
-                                        
-                                        # Check proximity to pickup location if driver is arriving
-                                        if ride.status == "driver_arriving":
-                                            from app.services.location_service import calculate_distance
-                                            
-                                            # Extract pickup coordinates from JSON
-                                            pickup_lat = ride.pickup_location.get("latitude")
-                                            pickup_lon = ride.pickup_location.get("longitude")
-                                            
-                                            if pickup_lat and pickup_lon:
-                                                # Calculate distance to pickup
-                                                distance_km = calculate_distance(
-                                                    latitude, longitude,
-                                                    pickup_lat, pickup_lon
-                                                )
-                                                distance_meters = distance_km * 1000
-                                                
-                                                # If within 500m, send proximity notification
-                                                if distance_meters <= 500:
-                                                    proximity_notification = {
-                                                        "type": "driver_nearby",
-                                                        "data": {
-                                                            "ride_id": ride_id,
-                                                            "driver_id": user_id,
-                                                            "distance_meters": round(distance_meters, 2),
-                                                            "message": "Your driver is nearby and will arrive soon"
-                                                        },
-                                                        "timestamp": datetime.utcnow().isoformat()
-                                                    }
-                                                    await connection_manager.send_personal_message(
-                                                        proximity_notification,
-                                                        ride.rider_id
-                                                    )
-                                                    
-                                                    logger.info(f"Proximity notification sent to rider {ride.rider_id}: {distance_meters}m")
-                                finally:
-                                    db.close()
-                        
-                        except Exception as e:
-                            logger.error(f"Error processing location update: {e}")
-                            await websocket.send_json({
-                                "type": "error",
-                                "data": {
-                                    "message": f"Error processing location update: {str(e)}"
-                                }
-                            })
-                    
-                    elif message_type == "ride_accept":
-                        # Driver accepting a ride
-                        ride_id = message_data.get("ride_id")
-                        rider_id = message_data.get("rider_id")
-                        
-                        if not ride_id or not rider_id:
-                            await websocket.send_json({
+                            unpacked = msgpack.unpackb(data, raw=False)
+                        except (ValueError, msgpack.UnpackException):
+                            logger.error(f"Invalid MessagePack frame from {user_id}")
+                            await connection_manager.send_message(websocket, user_id, {
                                 "type": "error",
-                                "data": {
-                                    "message": "Missing ride_id or rider_id in ride_accept message"
-                                }
+                                "data": {"message": "Invalid MessagePack format"}
                             })
                             continue
-                        
-                        logger.info(f"Driver {user_id} accepting ride: {ride_id}")
-                        
-                        # Import here to avoid circular dependency
-                        from app.services.matching_service import MatchingService
-                        from app.database import get_db
-                        from app.config import get_redis_client
-                        
-                        # Get database session and Redis client
-                        db = next(get_db())
-                        redis_client = get_redis_client()
-                        
-                        try:
-                            # Create matching service instance
-                            matching_service = MatchingService(redis_client, db)
-                            
-                            # Attempt to match the ride
-                            match_result = matching_service.match_ride(
-                                ride_id=ride_id,
-                                driver_id=user_id,
-                                rider_id=rider_id
-                            )
-                            
-                            # Send result back to driver
-                            if match_result["status"] == "success":
-                                # Send success confirmation to driver
-                                await websocket.send_json({
-                                    "type": "ride_match_confirmed",
-                                    "data": match_result
-                                })
-                                
-                                # Send match notification to rider
-                                rider_notification = {
-                                    "type": "ride_matched",
-                                    "data": {
-                                        "ride_id": ride_id,
-                                        "driver_id": user_id,
-                                        "driver_details": match_result.get("driver_details"),
-                                        "vehicle_details": match_result.get("vehicle_details"),
-                                        "estimated_arrival_minutes": match_result.get("estimated_arrival_minutes"),
-                                        "distance_to_pickup_km": match_result.get("distance_to_pickup_km"),
-                                        "matched_at": match_result.get("matched_at")
-                                    },
-                                    "timestamp": datetime.utcnow().isoformat()
-                                }
-                                await connection_manager.send_personal_message(rider_notification, rider_id)
-                                
-                                # Cancel notifications to other drivers
-                                broadcast_details = matching_service.get_broadcast_details(ride_id)
-                                if broadcast_details:
-                                    notified_drivers = broadcast_details.get("notified_drivers", [])
-                                    cancellation_message = {
-                                        "type": "ride_no_longer_available",
-                                        "data": {
-                                            "ride_id": ride_id,
-                                            "reason": "Ride has been matched to another driver"
-                                        },
-                                        "timestamp": datetime.utcnow().isoformat()
-                                    }
-                                    
-                                    # Send cancellation to all notified drivers except the matched one
-                                    for driver_id in notified_drivers:
-                                        if driver_id != user_id:
-                                            await connection_manager.send_personal_message(
-                                                cancellation_message,
-                                                driver_id
-                                            )
-                                
-                                logger.info(f"Ride {ride_id} successfully matched to driver {user_id}")
-                            
-                            elif match_result["status"] == "already_matched":
-                                # Ride already matched to another driver
-                                await websocket.send_json({
-                                    "type": "ride_match_failed",
-                                    "data": {
-                                        "ride_id": ride_id,
-                                        "reason": "already_matched",
-                                        "message": match_result.get("message")
-                                    }
-                                })
-                            
-                            elif match_result["status"] == "processing":
-                                # Another driver is being processed
-                                await websocket.send_json({
-                                    "type": "ride_match_processing",
-                                    "data": {
-                                        "ride_id": ride_id,
-                                        "message": match_result.get("message")
-                                    }
-                                })
-                            
-                            else:
-                                # Other error
-                                await websocket.send_json({
-                                    "type": "ride_match_failed",
-                                    "data": {
-                                        "ride_id": ride_id,
-                                        "reason": "error",
-                                        "message": match_result.get("message")
-                                    }
-                                })
-                        
-                        except Exception as e:
-                            logger.error(f"Error processing ride acceptance: {e}")
-                            await websocket.send_json({
-                                "type": "error",
-                                "data": {
-                                    "message": f"Error processing ride acceptance: {str(e)}"
-                                }
-                            })
-                        
-                        finally:
-                            db.close()
-                    
-                    elif message_type == "ride_reject":
-                        # Driver rejecting a ride
-                        ride_id = message_data.get("ride_id")
-                        
-                        if not ride_id:
-                            await websocket.send_json({
-                                "type": "error",
-                                "data": {
-                                    "message": "Missing ride_id in ride_reject message"
-                                }
-                            })
-                            continue
-                        
-                        logger.info(f"Driver {user_id} rejecting ride: {ride_id}")
-                        
-                        # Import here to avoid circular dependency
-                        from app.services.matching_service import MatchingService
-                        from app.database import get_db
-                        from app.config import get_redis_client
-                        
-                        # Get database session and Redis client
-                        db = next(get_db())
-                        redis_client = get_redis_client()
-                        
-                        try:
-                            # Create matching service instance
-                            matching_service = MatchingService(redis_client, db)
-                            
-                            # Record the rejection
-                            reject_result = matching_service.reject_ride(
-                                ride_id=ride_id,
-                                driver_id=user_id
-                            )
-                            
-                            # Send result back to driver
-                            if reject_result["status"] == "success":
-                                await websocket.send_json({
-                                    "type": "ride_reject_confirmed",
-                                    "data": {
-                                        "ride_id": ride_id,
-                                        "message": "Ride rejection recorded"
-                                    }
-                                })
-                                
-                                logger.info(f"Driver {user_id} rejection of ride {ride_id} recorded")
-                            
-                            else:
-                                await websocket.send_json({
-                                    "type": "ride_reject_failed",
-                                    "data": {
-                                        "ride_id": ride_id,
-                                        "message": reject_result.get("message")
-                                    }
-                                })
-                        
-                        except Exception as e:
-                            logger.error(f"Error processing ride rejection: {e}")
-                            await websocket.send_json({
-                                "type": "error",
-                                "data": {
-                                    "message": f"Error processing ride rejection: {str(e)}"
-                                }
-                            })
-                        
-                        finally:
-                            db.close()
-                    
+                        message = WebSocketMessage.model_validate(unpacked)
+                    else:
+                        data = await websocket.receive_text()
+                        # Parse and validate the envelope in a single pass
+                        message = WebSocketMessage.model_validate_json(data)
+                
+                except ValidationError as e:
+                    if any(error["type"] == "json_invalid" for error in e.errors()):
+                        logger.error(f"Invalid JSON from {user_id}: {data}")
+                        error_message = "Invalid JSON format"
                     else:
-                        logger.warning(f"Unknown message type from {user_id}: {message_type}")
-                        await websocket.send_json({
-                            "type": "error",
-                            "data": {
-                                "message": f"Unknown message type: {message_type}"
-                            }
-                        })
+                        logger.error(f"Invalid message from {user_id}: {data}")
+                        error_message = "Invalid message format"
+                    await connection_manager.send_message(websocket, user_id, {
+                        "type": "error",
+                        "data": {"message": error_message}
+                    })
+                    continue
+                
+                message_type = message.type
+                message_data = message.data
+                # One server timestamp shared by every payload built for this message
+                now_iso = datetime.utcnow().isoformat()
+                
+                logger.debug(f"Received message from {user_id}: type={message_type}")
                 
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON from {user_id}: {data}")
-                    await websocket.send_json({
+                # Dispatch to the handler for this message type; errors raised
+                # by a handler are not client format errors and propagate
+                handler = _HANDLERS.get(message_type)
+                if handler is None:
+                    logger.warning(f"Unknown message type from {user_id}: {message_type}")
+                    await connection_manager.send_message(websocket, user_id, {
                         "type": "error",
-                        "data": {"message": "Invalid JSON format"}
+                        "data": {
+                            "message": f"Unknown message type: {message_type}"
+                        }
                     })
+                else:
+                    await handler(websocket, user_id, message_data, now_iso)
         
         except WebSocketDisconnect:
             logger.info(f"WebSocket disconnected normally: user_id={user_id}")
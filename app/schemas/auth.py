@@ -1,34 +1,71 @@
 """
 Authentication schemas for user registration and login.
 """
-from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
-from typing import Optional
-from datetime import datetime
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    field_validator,
+    model_validator
+)
+from typing import Annotated, Literal, Optional
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+import time
+
+from app.schemas.common import ErrorResponse
+
+
+# Insurance must remain valid for at least this long after registration
+_MIN_INSURANCE_DELTA = timedelta(days=30)
+
+
+@lru_cache(maxsize=1)
+def _min_insurance_expiry(minute: int) -> date:
+    """Earliest acceptable insurance expiry date for a UTC epoch minute."""
+    return datetime.fromtimestamp(minute * 60, timezone.utc).date() + _MIN_INSURANCE_DELTA
+
+
+def _check_phone_number(v: str) -> str:
+    """Validate phone number is +91 followed by 10 digits."""
+    if not (len(v) == 13 and v[:3] == '+91' and v[3:].isascii() and v[3:].isdigit()):
+        raise ValueError('Phone number must be in format +91XXXXXXXXXX')
+    return v
+
+
+PhoneNumber = Annotated[str, AfterValidator(_check_phone_number)]
+# A single anchored pattern also enforces the length, so no separate
+# min/max_length checks are needed
+VerificationCode = Annotated[str, StringConstraints(pattern=r'^[0-9]{6}$')]
+# Shape check only; full RFC 5322 validation is not needed at registration
+EmailAddress = Annotated[str, StringConstraints(max_length=254, pattern=r'^[^@\s]+@[^@\s]+\.[^@\s]+$')]
 
 
 class VehicleInfo(BaseModel):
     """Vehicle information for driver registration."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
     registration_number: str = Field(..., min_length=1, max_length=50)
     make: str = Field(..., min_length=1, max_length=50)
     model: str = Field(..., min_length=1, max_length=50)
     color: str = Field(..., min_length=1, max_length=30)
     license_number: str = Field(..., min_length=1, max_length=50)
+    # Kept as datetime: clients send full ISO timestamps, which a `date`
+    # field would reject unless the time part is exactly midnight, and the
+    # driver profile column is a DateTime
     insurance_expiry: datetime
     
-    @field_validator('insurance_expiry', mode='before')
+    @field_validator('insurance_expiry')
     @classmethod
     def validate_insurance_expiry(cls, v):
         """Validate insurance expiry is at least 30 days in future."""
-        if v is None:
-            return v
-        
-        if isinstance(v, str):
-            v = datetime.fromisoformat(v.replace('Z', '+00:00'))
-        
-        from datetime import timedelta
-        # Use date comparison to avoid timing issues with exact timestamps
-        today = datetime.utcnow().date()
-        min_expiry_date = today + timedelta(days=30)
+        # Runs after pydantic-core has parsed the ISO 8601 string (including
+        # a trailing 'Z'), so no Python-level parsing is needed here
+        # Use date comparison to avoid timing issues with exact timestamps;
+        # minute granularity is plenty for a 30-day window
+        min_expiry_date = _min_insurance_expiry(int(time.time() // 60))
         
         if v.date() < min_expiry_date:
             raise ValueError('Insurance must be valid for at least 30 days')
@@ -37,25 +74,35 @@ class VehicleInfo(BaseModel):
 
 class UserRegistrationRequest(BaseModel):
     """Request schema for user registration."""
-    phone_number: str = Field(..., pattern=r'^\+91\d{10}$')
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
+    phone_number: PhoneNumber
     name: str = Field(..., min_length=2, max_length=100)
-    email: EmailStr
+    email: EmailAddress
     password: str = Field(..., min_length=8, max_length=100)
-    user_type: str = Field(..., pattern=r'^(rider|driver)$')
+    user_type: Literal['rider', 'driver']
     vehicle_info: Optional[VehicleInfo] = None
     
-    @model_validator(mode='after')
-    def validate_driver_vehicle(self):
+    @model_validator(mode='before')
+    @classmethod
+    def validate_driver_vehicle(cls, data):
         """Validate that drivers provide vehicle information."""
-        if self.user_type == 'driver' and self.vehicle_info is None:
-            raise ValueError('Vehicle information is required for driver registration')
-        if self.user_type == 'rider' and self.vehicle_info is not None:
-            raise ValueError('Vehicle information should not be provided for rider registration')
-        return self
+        # Runs before field validation so a rider's stray vehicle_info is
+        # rejected without validating the nested VehicleInfo first
+        if isinstance(data, dict):
+            user_type = data.get('user_type')
+            has_vehicle = data.get('vehicle_info') is not None
+            if user_type == 'driver' and not has_vehicle:
+                raise ValueError('Vehicle information is required for driver registration')
+            if user_type == 'rider' and has_vehicle:
+                raise ValueError('Vehicle information should not be provided for rider registration')
+        return data
 
 
 class UserRegistrationResponse(BaseModel):
     """Response schema for successful user registration."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True, from_attributes=True)
+
     user_id: str
     phone_number: str
     name: str
@@ -64,23 +111,19 @@ class UserRegistrationResponse(BaseModel):
     phone_verified: bool
     created_at: datetime
     message: str = "User registered successfully. Please verify your phone number."
-    
-    class Config:
-        from_attributes = True
-
-
-class ErrorResponse(BaseModel):
-    """Error response schema."""
-    detail: str
 
 
 class VerificationSendRequest(BaseModel):
     """Request schema for sending verification code."""
-    phone_number: str = Field(..., pattern=r'^\+91\d{10}$')
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
+    phone_number: PhoneNumber
 
 
 class VerificationSendResponse(BaseModel):
     """Response schema for verification code sent."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
     session_id: str
     phone_number: str
     expires_at: datetime
@@ -89,12 +132,16 @@ class VerificationSendResponse(BaseModel):
 
 class VerificationConfirmRequest(BaseModel):
     """Request schema for confirming verification code."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
     session_id: str
-    code: str = Field(..., min_length=6, max_length=6, pattern=r'^\d{6}$')
+    code: VerificationCode
 
 
 class VerificationConfirmResponse(BaseModel):
     """Response schema for successful verification."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
     session_id: str
     phone_number: str
     verified: bool
@@ -103,12 +150,16 @@ class VerificationConfirmResponse(BaseModel):
 
 class LoginRequest(BaseModel):
     """Request schema for user login."""
-    phone_number: str = Field(..., pattern=r'^\+91\d{10}$')
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
+    phone_number: PhoneNumber
     password: str = Field(..., min_length=8, max_length=100)
 
 
 class LoginResponse(BaseModel):
     """Response schema for successful login."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
     access_token: str
     token_type: str = "bearer"
     user_id: str
@@ -123,12 +174,11 @@ class LoginResponse(BaseModel):
 
 class IDVerificationResponse(BaseModel):
     """Response schema for ID document verification."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True, from_attributes=True)
+
     driver_id: str
     document_type: str
     document_path: str
     uploaded_at: datetime
     verification_status: str
     message: str = "ID document uploaded successfully and pending verification"
-    
-    class Config:
-        from_attributes = True
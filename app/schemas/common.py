@@ -0,0 +1,88 @@
+"""
+Pydantic schemas shared across API endpoints.
+"""
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, Optional
+
+
+class Location(BaseModel):
+    """
+    Schema for a geographic point with an optional address.
+
+    Used for ride, scheduled ride and parcel locations and as the base of
+    driver location updates, so all of them share one validator.
+    """
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
+            "example": {
+                "latitude": 22.7196,
+                "longitude": 75.8577,
+                "address": "Vijay Nagar, Indore, Madhya Pradesh"
+            }
+        }
+    )
+
+    latitude: float = Field(
+        ...,
+        description="Latitude coordinate",
+        ge=-90,
+        le=90,
+        example=22.7196
+    )
+    longitude: float = Field(
+        ...,
+        description="Longitude coordinate",
+        ge=-180,
+        le=180,
+        example=75.8577
+    )
+    address: Optional[str] = Field(
+        None,
+        description="Human-readable address",
+        min_length=1,
+        max_length=500,
+        example="Vijay Nagar, Indore, Madhya Pradesh"
+    )
+
+
+class StoredLocation(BaseModel):
+    """
+    Schema for a location read back from the database in API responses.
+
+    Unlike Location it applies no coordinate bounds or address length, so
+    rows stored before those rules existed still serialize.
+    """
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
+    latitude: float = Field(..., description="Latitude coordinate")
+    longitude: float = Field(..., description="Longitude coordinate")
+    address: Optional[str] = Field(None, description="Human-readable address")
+
+
+class ErrorResponse(BaseModel):
+    """
+    Schema for error responses.
+
+    HTTPException errors carry only `detail`; structured errors such as
+    service area violations carry `error`, `message` and `details`.
+    """
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
+            "example": {
+                "error": "boundary_violation",
+                "message": "Location is outside Indore service area. Service is only available within Indore city limits.",
+                "details": {
+                    "location_type": "pickup",
+                    "latitude": 23.0,
+                    "longitude": 76.0
+                }
+            }
+        }
+    )
+
+    error: Optional[str] = Field(None, description="Error type")
+    message: Optional[str] = Field(None, description="Error message")
+    detail: Optional[str] = Field(None, description="Error detail")
+    details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
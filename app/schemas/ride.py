@@ -1,55 +1,62 @@
 """
 Pydantic schemas for ride API endpoints.
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Any, Dict, Optional
+
+from app.schemas.common import ErrorResponse, Location, StoredLocation
+
+
+# Kept under its original name for API compatibility
+LocationInput = Location
+
+
+# OpenAPI examples, shared by reference between the schemas below
+_PICKUP_EXAMPLE = {
+    "latitude": 22.7196,
+    "longitude": 75.8577,
+    "address": "Vijay Nagar, Indore, Madhya Pradesh"
+}
+_DESTINATION_EXAMPLE = {
+    "latitude": 22.7520,
+    "longitude": 75.8937,
+    "address": "Rajwada, Indore, Madhya Pradesh"
+}
+_FARE_BREAKDOWN_EXAMPLE = {
+    "base": 30.0,
+    "per_km": 12.0,
+    "distance": 5.5,
+    "surge": 1.0
+}
+_RIDE_HISTORY_ITEM_EXAMPLE = {
+    "ride_id": "ride_123456789",
+    "date": "2024-01-15T10:30:00Z",
+    "pickup_location": _PICKUP_EXAMPLE,
+    "destination": _DESTINATION_EXAMPLE,
+    "fare": 96.0,
+    "status": "completed",
+    "driver_rating": 5,
+    "rider_rating": 4
+}
 
 
-class LocationInput(BaseModel):
+class RideRequestCreate(BaseModel):
     """
-    Schema for location input in ride requests.
+    Schema for creating a ride request.
     
-    Requirements: 2.1
+    Requirements: 2.1, 2.2
     """
-    latitude: float = Field(
-        ...,
-        description="Latitude coordinate",
-        ge=-90,
-        le=90,
-        example=22.7196
-    )
-    longitude: float = Field(
-        ...,
-        description="Longitude coordinate",
-        ge=-180,
-        le=180,
-        example=75.8577
-    )
-    address: str = Field(
-        ...,
-        description="Human-readable address",
-        min_length=1,
-        max_length=500,
-        example="Vijay Nagar, Indore, Madhya Pradesh"
-    )
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
             "example": {
-                "latitude": 22.7196,
-                "longitude": 75.8577,
-                "address": "Vijay Nagar, Indore, Madhya Pradesh"
+                "pickup_location": _PICKUP_EXAMPLE,
+                "destination": _DESTINATION_EXAMPLE
             }
         }
+    )
 
-
-class RideRequestCreate(BaseModel):
-    """
-    Schema for creating a ride request.
-    
-    Requirements: 2.1, 2.2
-    """
     pickup_location: LocationInput = Field(
         ...,
         description="Pickup location with coordinates and address"
@@ -58,22 +65,6 @@ class RideRequestCreate(BaseModel):
         ...,
         description="Destination location with coordinates and address"
     )
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "pickup_location": {
-                    "latitude": 22.7196,
-                    "longitude": 75.8577,
-                    "address": "Vijay Nagar, Indore, Madhya Pradesh"
-                },
-                "destination": {
-                    "latitude": 22.7520,
-                    "longitude": 75.8937,
-                    "address": "Rajwada, Indore, Madhya Pradesh"
-                }
-            }
-        }
 
 
 class FareBreakdownResponse(BaseModel):
@@ -82,20 +73,25 @@ class FareBreakdownResponse(BaseModel):
     
     Requirements: 5.3
     """
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={"example": _FARE_BREAKDOWN_EXAMPLE}
+    )
+
     base: float = Field(..., description="Base fare in ₹")
     per_km: float = Field(..., description="Rate per kilometer in ₹")
     distance: float = Field(..., description="Distance in kilometers")
     surge: float = Field(..., description="Surge multiplier")
+
+
+class RideFareBreakdown(FareBreakdownResponse):
+    """
+    Schema for the fare breakdown stored with a ride.
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "base": 30.0,
-                "per_km": 12.0,
-                "distance": 5.5,
-                "surge": 1.0
-            }
-        }
+    Requirements: 5.3, 5.4
+    """
+    total: Optional[float] = Field(None, description="Estimated total fare in ₹")
+    final_total: Optional[float] = Field(None, description="Final total fare in ₹")
 
 
 class RideRequestResponse(BaseModel):
@@ -104,43 +100,32 @@ class RideRequestResponse(BaseModel):
     
     Requirements: 2.1, 2.2, 2.5
     """
-    request_id: str = Field(..., description="Unique ride request ID")
-    estimated_fare: float = Field(..., description="Estimated fare in ₹")
-    estimated_arrival: int = Field(..., description="Estimated arrival time in minutes")
-    fare_breakdown: FareBreakdownResponse = Field(..., description="Detailed fare breakdown")
-    pickup_location: Dict[str, Any] = Field(..., description="Pickup location details")
-    destination: Dict[str, Any] = Field(..., description="Destination details")
-    requested_at: datetime = Field(..., description="When the request was created")
-    status: str = Field(..., description="Current request status")
-    message: str = Field(..., description="Response message")
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
             "example": {
                 "request_id": "ride_123456789",
                 "estimated_fare": 96.0,
                 "estimated_arrival": 8,
-                "fare_breakdown": {
-                    "base": 30.0,
-                    "per_km": 12.0,
-                    "distance": 5.5,
-                    "surge": 1.0
-                },
-                "pickup_location": {
-                    "latitude": 22.7196,
-                    "longitude": 75.8577,
-                    "address": "Vijay Nagar, Indore, Madhya Pradesh"
-                },
-                "destination": {
-                    "latitude": 22.7520,
-                    "longitude": 75.8937,
-                    "address": "Rajwada, Indore, Madhya Pradesh"
-                },
+                "fare_breakdown": _FARE_BREAKDOWN_EXAMPLE,
+                "pickup_location": _PICKUP_EXAMPLE,
+                "destination": _DESTINATION_EXAMPLE,
                 "requested_at": "2024-01-15T10:30:00Z",
                 "status": "requested",
                 "message": "Ride request created successfully"
             }
         }
+    )
+
+    request_id: str = Field(..., description="Unique ride request ID")
+    estimated_fare: float = Field(..., description="Estimated fare in ₹")
+    estimated_arrival: int = Field(..., description="Estimated arrival time in minutes")
+    fare_breakdown: FareBreakdownResponse = Field(..., description="Detailed fare breakdown")
+    pickup_location: LocationInput = Field(..., description="Pickup location details")
+    destination: LocationInput = Field(..., description="Destination details")
+    requested_at: datetime = Field(..., description="When the request was created")
+    status: str = Field(..., description="Current request status")
+    message: str = Field(..., description="Response message")
 
 
 class RideHistoryItem(BaseModel):
@@ -149,36 +134,19 @@ class RideHistoryItem(BaseModel):
     
     Requirements: 9.2, 9.3
     """
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={"example": _RIDE_HISTORY_ITEM_EXAMPLE}
+    )
+
     ride_id: str = Field(..., description="Unique ride identifier")
     date: datetime = Field(..., description="Ride date and time")
-    pickup_location: Dict[str, Any] = Field(..., description="Pickup location details")
-    destination: Dict[str, Any] = Field(..., description="Destination details")
+    pickup_location: StoredLocation = Field(..., description="Pickup location details")
+    destination: StoredLocation = Field(..., description="Destination details")
     fare: float = Field(..., description="Final fare (or estimated if not completed)")
     status: str = Field(..., description="Ride status")
     driver_rating: Optional[int] = Field(None, description="Rating given to driver (1-5)")
     rider_rating: Optional[int] = Field(None, description="Rating given to rider (1-5)")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "ride_id": "ride_123456789",
-                "date": "2024-01-15T10:30:00Z",
-                "pickup_location": {
-                    "latitude": 22.7196,
-                    "longitude": 75.8577,
-                    "address": "Vijay Nagar, Indore"
-                },
-                "destination": {
-                    "latitude": 22.7520,
-                    "longitude": 75.8937,
-                    "address": "Rajwada, Indore"
-                },
-                "fare": 96.0,
-                "status": "completed",
-                "driver_rating": 5,
-                "rider_rating": 4
-            }
-        }
 
 
 class RideHistoryResponse(BaseModel):
@@ -187,35 +155,18 @@ class RideHistoryResponse(BaseModel):
     
     Requirements: 9.1, 9.2, 9.3
     """
-    rides: list[RideHistoryItem] = Field(..., description="List of rides in reverse chronological order")
-    total: int = Field(..., description="Total number of rides matching filters")
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
             "example": {
-                "rides": [
-                    {
-                        "ride_id": "ride_123456789",
-                        "date": "2024-01-15T10:30:00Z",
-                        "pickup_location": {
-                            "latitude": 22.7196,
-                            "longitude": 75.8577,
-                            "address": "Vijay Nagar, Indore"
-                        },
-                        "destination": {
-                            "latitude": 22.7520,
-                            "longitude": 75.8937,
-                            "address": "Rajwada, Indore"
-                        },
-                        "fare": 96.0,
-                        "status": "completed",
-                        "driver_rating": 5,
-                        "rider_rating": None
-                    }
-                ],
+                "rides": [_RIDE_HISTORY_ITEM_EXAMPLE],
                 "total": 1
             }
         }
+    )
+
+    rides: list[RideHistoryItem] = Field(..., description="List of rides in reverse chronological order")
+    total: int = Field(..., description="Total number of rides matching filters")
 
 
 class RideDetailsResponse(BaseModel):
@@ -224,60 +175,16 @@ class RideDetailsResponse(BaseModel):
     
     Requirements: 9.3, 9.5
     """
-    ride_id: str = Field(..., description="Unique ride identifier")
-    rider_id: str = Field(..., description="Rider user ID")
-    driver_id: Optional[str] = Field(None, description="Driver user ID")
-    status: str = Field(..., description="Ride status")
-    
-    # Locations
-    pickup_location: Dict[str, Any] = Field(..., description="Pickup location details")
-    destination: Dict[str, Any] = Field(..., description="Destination details")
-    actual_route: Optional[list[Dict[str, Any]]] = Field(None, description="Actual route taken")
-    
-    # Timing
-    requested_at: datetime = Field(..., description="When ride was requested")
-    matched_at: Optional[datetime] = Field(None, description="When driver was matched")
-    pickup_time: Optional[datetime] = Field(None, description="When driver arrived at pickup")
-    start_time: Optional[datetime] = Field(None, description="When ride started")
-    completed_at: Optional[datetime] = Field(None, description="When ride completed")
-    
-    # Fare
-    estimated_fare: float = Field(..., description="Estimated fare")
-    final_fare: Optional[float] = Field(None, description="Final fare charged")
-    fare_breakdown: Dict[str, Any] = Field(..., description="Fare breakdown details")
-    
-    # Payment
-    payment_status: str = Field(..., description="Payment status")
-    transaction_id: Optional[str] = Field(None, description="Payment transaction ID")
-    
-    # Ratings
-    rider_rating: Optional[int] = Field(None, description="Rating given to rider")
-    rider_review: Optional[str] = Field(None, description="Review text for rider")
-    driver_rating: Optional[int] = Field(None, description="Rating given to driver")
-    driver_review: Optional[str] = Field(None, description="Review text for driver")
-    
-    # Cancellation
-    cancelled_by: Optional[str] = Field(None, description="User ID who cancelled")
-    cancellation_reason: Optional[str] = Field(None, description="Cancellation reason")
-    cancellation_fee: Optional[float] = Field(None, description="Cancellation fee charged")
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
             "example": {
                 "ride_id": "ride_123456789",
                 "rider_id": "user_abc123",
                 "driver_id": "user_def456",
                 "status": "completed",
-                "pickup_location": {
-                    "latitude": 22.7196,
-                    "longitude": 75.8577,
-                    "address": "Vijay Nagar, Indore"
-                },
-                "destination": {
-                    "latitude": 22.7520,
-                    "longitude": 75.8937,
-                    "address": "Rajwada, Indore"
-                },
+                "pickup_location": _PICKUP_EXAMPLE,
+                "destination": _DESTINATION_EXAMPLE,
                 "actual_route": None,
                 "requested_at": "2024-01-15T10:30:00Z",
                 "matched_at": "2024-01-15T10:32:00Z",
@@ -286,13 +193,7 @@ class RideDetailsResponse(BaseModel):
                 "completed_at": "2024-01-15T11:00:00Z",
                 "estimated_fare": 96.0,
                 "final_fare": 96.0,
-                "fare_breakdown": {
-                    "base": 30.0,
-                    "per_km": 12.0,
-                    "distance": 5.5,
-                    "surge": 1.0,
-                    "total": 96.0
-                },
+                "fare_breakdown": {**_FARE_BREAKDOWN_EXAMPLE, "total": 96.0},
                 "payment_status": "completed",
                 "transaction_id": "txn_xyz789",
                 "rider_rating": 4,
@@ -304,25 +205,41 @@ class RideDetailsResponse(BaseModel):
                 "cancellation_fee": None
             }
         }
+    )
 
-
-class ErrorResponse(BaseModel):
-    """
-    Schema for error responses.
-    """
-    error: str = Field(..., description="Error type")
-    message: str = Field(..., description="Error message")
-    details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
+    # Required fields are declared first, optional ones after them
+    ride_id: str = Field(..., description="Unique ride identifier")
+    rider_id: str = Field(..., description="Rider user ID")
+    status: str = Field(..., description="Ride status")
+    pickup_location: StoredLocation = Field(..., description="Pickup location details")
+    destination: StoredLocation = Field(..., description="Destination details")
+    requested_at: datetime = Field(..., description="When ride was requested")
+    estimated_fare: float = Field(..., description="Estimated fare")
+    fare_breakdown: RideFareBreakdown = Field(..., description="Fare breakdown details")
+    payment_status: str = Field(..., description="Payment status")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": "boundary_violation",
-                "message": "Location is outside Indore service area. Service is only available within Indore city limits.",
-                "details": {
-                    "location_type": "pickup",
-                    "latitude": 23.0,
-                    "longitude": 76.0
-                }
-            }
-        }
+    # Assignment and route
+    driver_id: Optional[str] = Field(None, description="Driver user ID")
+    # Stored route points are passed through as-is, including their timestamps
+    actual_route: Optional[list[Dict[str, Any]]] = Field(None, description="Actual route taken")
+    
+    # Timing
+    matched_at: Optional[datetime] = Field(None, description="When driver was matched")
+    pickup_time: Optional[datetime] = Field(None, description="When driver arrived at pickup")
+    start_time: Optional[datetime] = Field(None, description="When ride started")
+    completed_at: Optional[datetime] = Field(None, description="When ride completed")
+    
+    # Fare and payment
+    final_fare: Optional[float] = Field(None, description="Final fare charged")
+    transaction_id: Optional[str] = Field(None, description="Payment transaction ID")
+    
+    # Ratings
+    rider_rating: Optional[int] = Field(None, description="Rating given to rider")
+    rider_review: Optional[str] = Field(None, description="Review text for rider")
+    driver_rating: Optional[int] = Field(None, description="Rating given to driver")
+    driver_review: Optional[str] = Field(None, description="Review text for driver")
+    
+    # Cancellation
+    cancelled_by: Optional[str] = Field(None, description="User ID who cancelled")
+    cancellation_reason: Optional[str] = Field(None, description="Cancellation reason")
+    cancellation_fee: Optional[float] = Field(None, description="Cancellation fee charged")
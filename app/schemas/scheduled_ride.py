@@ -1,20 +1,34 @@
 """
 Pydantic schemas for scheduled rides.
 """
-from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
 from datetime import datetime
 
+from app.schemas.common import Location, StoredLocation
 
-class LocationSchema(BaseModel):
-    """Location schema for pickup and destination."""
-    latitude: float = Field(..., description="Latitude coordinate")
-    longitude: float = Field(..., description="Longitude coordinate")
-    address: Optional[str] = Field(None, description="Human-readable address")
+
+# Kept under its original name for API compatibility
+LocationSchema = Location
+
+
+# OpenAPI examples, shared by reference between the schemas below
+_PICKUP_EXAMPLE = {
+    "latitude": 22.7196,
+    "longitude": 75.8577,
+    "address": "Rajwada, Indore"
+}
+_DESTINATION_EXAMPLE = {
+    "latitude": 22.7532,
+    "longitude": 75.8937,
+    "address": "Treasure Island Mall, Indore"
+}
 
 
 class FareBreakdownSchema(BaseModel):
     """Fare breakdown schema."""
+    model_config = ConfigDict(extra='ignore', frozen=True, defer_build=True)
+
     base: float
     per_km: float
     distance: float
@@ -23,73 +37,49 @@ class FareBreakdownSchema(BaseModel):
 
 class ScheduledRideRequest(BaseModel):
     """Request to create a scheduled ride."""
-    pickup_location: LocationSchema
-    destination: LocationSchema
-    scheduled_pickup_time: datetime = Field(..., description="Scheduled pickup time (ISO format)")
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
             "example": {
-                "pickup_location": {
-                    "latitude": 22.7196,
-                    "longitude": 75.8577,
-                    "address": "Rajwada, Indore"
-                },
-                "destination": {
-                    "latitude": 22.7532,
-                    "longitude": 75.8937,
-                    "address": "Treasure Island Mall, Indore"
-                },
+                "pickup_location": _PICKUP_EXAMPLE,
+                "destination": _DESTINATION_EXAMPLE,
                 "scheduled_pickup_time": "2026-02-20T10:00:00"
             }
         }
+    )
+
+    pickup_location: LocationSchema
+    destination: LocationSchema
+    scheduled_pickup_time: datetime = Field(..., description="Scheduled pickup time (ISO format)")
 
 
 class ScheduledRideUpdate(BaseModel):
     """Request to update a scheduled ride."""
-    pickup_location: Optional[LocationSchema] = None
-    destination: Optional[LocationSchema] = None
-    scheduled_pickup_time: Optional[datetime] = None
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=False, defer_build=True,
+        json_schema_extra={
             "example": {
                 "scheduled_pickup_time": "2026-02-20T11:00:00"
             }
         }
+    )
+
+    pickup_location: Optional[LocationSchema] = None
+    destination: Optional[LocationSchema] = None
+    scheduled_pickup_time: Optional[datetime] = None
 
 
 class ScheduledRideResponse(BaseModel):
     """Response for scheduled ride operations."""
-    ride_id: str
-    rider_id: str
-    driver_id: Optional[str]
-    pickup_location: Dict
-    destination: Dict
-    scheduled_pickup_time: datetime
-    estimated_fare: float
-    fare_breakdown: Dict
-    status: str
-    created_at: datetime
-    modified_at: Optional[datetime]
-    matched_at: Optional[datetime]
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='ignore', frozen=True, defer_build=True,
+        json_schema_extra={
             "example": {
                 "ride_id": "sched_ride_123",
                 "rider_id": "rider_456",
                 "driver_id": None,
-                "pickup_location": {
-                    "latitude": 22.7196,
-                    "longitude": 75.8577,
-                    "address": "Rajwada, Indore"
-                },
-                "destination": {
-                    "latitude": 22.7532,
-                    "longitude": 75.8937,
-                    "address": "Treasure Island Mall, Indore"
-                },
+                "pickup_location": _PICKUP_EXAMPLE,
+                "destination": _DESTINATION_EXAMPLE,
                 "scheduled_pickup_time": "2026-02-20T10:00:00",
                 "estimated_fare": 150.0,
                 "fare_breakdown": {
@@ -104,3 +94,17 @@ class ScheduledRideResponse(BaseModel):
                 "matched_at": None
             }
         }
+    )
+
+    ride_id: str
+    rider_id: str
+    driver_id: Optional[str]
+    pickup_location: StoredLocation
+    destination: StoredLocation
+    scheduled_pickup_time: datetime
+    estimated_fare: float
+    fare_breakdown: FareBreakdownSchema
+    status: str
+    created_at: datetime
+    modified_at: Optional[datetime]
+    matched_at: Optional[datetime]
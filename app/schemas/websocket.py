@@ -0,0 +1,45 @@
+"""
+Pydantic schemas for inbound WebSocket messages.
+"""
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, Optional
+
+
+class WebSocketMessage(BaseModel):
+    """Envelope of every message received from a WebSocket client."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+    type: Optional[str] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class PingMessage(BaseModel):
+    """Payload of a client ping."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+    timestamp: Optional[Any] = None
+
+
+class LocationUpdateMessage(BaseModel):
+    """Payload of a driver location update."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+    latitude: float
+    longitude: float
+    accuracy: Optional[float] = None
+    ride_id: Optional[str] = None
+
+
+class RideAcceptMessage(BaseModel):
+    """Payload of a driver accepting a ride."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+    ride_id: str = Field(..., min_length=1)
+    rider_id: str = Field(..., min_length=1)
+
+
+class RideRejectMessage(BaseModel):
+    """Payload of a driver rejecting a ride."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+    ride_id: str = Field(..., min_length=1)
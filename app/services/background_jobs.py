@@ -2,15 +2,24 @@
 Background job service for scheduled tasks.
 Handles insurance expiry monitoring, payout processing, scheduled rides, and other scheduled jobs.
 """
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta
+from itertools import islice
 from typing import List, Optional
+from sqlalchemy import and_, case
 from sqlalchemy.orm import Session
 
 from app.models.user import User, DriverProfile, DriverStatus
 from app.models.ride import Ride, RideStatus
 from app.services.location_service import LocationService
+from app.services.scheduled_ride_service import ScheduledRideService
 from app.database import get_mongodb
 
+logger = logging.getLogger(__name__)
+
+# Number of active rides checked per driver location lookup
+ROUTE_CHECK_BATCH_SIZE = 500
+
 
 class BackgroundJobService:
     """Service for running background jobs."""
@@ -33,80 +42,94 @@ class BackgroundJobService:
             List of suspended driver IDs
         """
         now = datetime.utcnow()
-        suspended_drivers = []
         
         # Find all drivers with expired insurance
-        expired_drivers = self.db.query(User).join(DriverProfile).filter(
-            User.user_type == "driver",
-            DriverProfile.insurance_expiry <= now,
-            DriverProfile.is_suspended == False
-        ).all()
-        
-        for driver in expired_drivers:
-            # Suspend driver
-            driver.driver_profile.is_suspended = True
-            driver.driver_profile.status = DriverStatus.UNAVAILABLE
-            suspended_drivers.append(driver.user_id)
+        suspended_drivers = [
+            driver_id for driver_id, in self.db.query(DriverProfile.driver_id).join(User).filter(
+                User.user_type == "driver",
+                DriverProfile.insurance_expiry <= now,
+                DriverProfile.is_suspended == False
+            )
+        ]
         
         if suspended_drivers:
+            # Suspend them with a single UPDATE
+            self.db.query(DriverProfile).filter(
+                DriverProfile.driver_id.in_(suspended_drivers)
+            ).update({
+                DriverProfile.is_suspended: True,
+                DriverProfile.status: DriverStatus.UNAVAILABLE
+            }, synchronize_session=False)
             self.db.commit()
         
         return suspended_drivers
     
-    def check_route_deviations(self) -> List[dict]:
+    async def check_route_deviations(self) -> List[dict]:
         """
         Check for route deviations in active rides.
         Should be run every 30 seconds.
         
+        Rides are streamed in batches and the current locations of each
+        batch's drivers are fetched with a single MongoDB query.
+        
         Returns:
             List of deviation alerts
         """
         alerts = []
         
-        # Get all in-progress rides
-        active_rides = self.db.query(Ride).filter(
-            Ride.status == RideStatus.IN_PROGRESS
-        ).all()
+        # Get all in-progress rides, loading only the columns needed here
+        active_rides = iter(
+            self.db.query(Ride.ride_id, Ride.driver_id, Ride.destination).filter(
+                Ride.status == RideStatus.IN_PROGRESS
+            ).yield_per(ROUTE_CHECK_BATCH_SIZE)
+        )
         
-        if not active_rides:
+        batch = list(islice(active_rides, ROUTE_CHECK_BATCH_SIZE))
+        if not batch:
             return alerts
         
         # Get MongoDB connection
         mongodb = get_mongodb()
-        location_service = LocationService(self.db, mongodb)
-        
-        for ride in active_rides:
-            try:
-                # Get driver's current location
-                driver_location = location_service.get_driver_location(ride.driver_id)
-                
-                if not driver_location:
+        location_service = LocationService(mongodb)
+        
+        while batch:
+            # Get current locations of all drivers in this batch
+            driver_locations = await location_service.get_driver_locations_bulk(
+                [ride.driver_id for ride in batch]
+            )
+            
+            for ride in batch:
+                try:
+                    driver_location = driver_locations.get(ride.driver_id)
+                    
+                    if not driver_location:
+                        continue
+                    
+                    # Get expected route (simplified - in production would use actual route)
+                    # For now, we'll check if driver is significantly far from destination
+                    destination = ride.destination
+                    
+                    # Calculate distance from current location to destination
+                    distance = location_service.calculate_distance(
+                        driver_location.get_latitude(),
+                        driver_location.get_longitude(),
+                        destination["latitude"],
+                        destination["longitude"]
+                    )
+                    
+                    # Simple deviation check: if driver is moving away from destination
+                    # In production, this would use actual route polyline
+                    # For now, we'll just log significant deviations
+                    
+                    # This is a placeholder - actual implementation would need route polyline
+                    # and check distance from route, not just destination
+                    
+                except Exception:
+                    # Log error but continue processing other rides
+                    logger.exception("Error checking route deviation for ride %s", ride.ride_id)
                     continue
-                
-                # Get expected route (simplified - in production would use actual route)
-                # For now, we'll check if driver is significantly far from destination
-                import json
-                destination = json.loads(ride.destination)
-                
-                # Calculate distance from current location to destination
-                distance = location_service.calculate_distance(
-                    driver_location["latitude"],
-                    driver_location["longitude"],
-                    destination["latitude"],
-                    destination["longitude"]
-                )
-                
-                # Simple deviation check: if driver is moving away from destination
-                # In production, this would use actual route polyline
-                # For now, we'll just log significant deviations
-                
-                # This is a placeholder - actual implementation would need route polyline
-                # and check distance from route, not just destination
-                
-            except Exception as e:
-                # Log error but continue processing other rides
-                print(f"Error checking route deviation for ride {ride.ride_id}: {str(e)}")
-                continue
+            
+            batch = list(islice(active_rides, ROUTE_CHECK_BATCH_SIZE))
         
         return alerts
     
@@ -118,15 +141,14 @@ class BackgroundJobService:
         Returns:
             Number of drivers reset
         """
-        drivers = self.db.query(DriverProfile).filter(
-            DriverProfile.cancellation_count > 0
-        ).all()
+        now = datetime.utcnow()
         
-        count = 0
-        for driver in drivers:
-            driver.cancellation_count = 0
-            driver.last_cancellation_reset = datetime.utcnow()
-            count += 1
+        count = self.db.query(DriverProfile).filter(
+            DriverProfile.cancellation_count > 0
+        ).update({
+            DriverProfile.cancellation_count: 0,
+            DriverProfile.last_cancellation_reset: now
+        }, synchronize_session=False)
         
         if count > 0:
             self.db.commit()
@@ -141,28 +163,28 @@ class BackgroundJobService:
         Returns:
             List of unsuspended driver IDs
         """
-        from datetime import timedelta
-        
         now = datetime.utcnow()
         cutoff_time = now - timedelta(hours=24)
-        unsuspended_drivers = []
         
         # Find drivers suspended for cancellations more than 24 hours ago
-        suspended_drivers = self.db.query(User).join(DriverProfile).filter(
-            User.user_type == "driver",
-            DriverProfile.is_suspended == True,
-            DriverProfile.last_cancellation_reset <= cutoff_time,
-            DriverProfile.cancellation_count >= 3
-        ).all()
-        
-        for driver in suspended_drivers:
-            # Unsuspend driver and reset cancellation count
-            driver.driver_profile.is_suspended = False
-            driver.driver_profile.cancellation_count = 0
-            driver.driver_profile.last_cancellation_reset = now
-            unsuspended_drivers.append(driver.user_id)
+        unsuspended_drivers = [
+            driver_id for driver_id, in self.db.query(DriverProfile.driver_id).join(User).filter(
+                User.user_type == "driver",
+                DriverProfile.is_suspended == True,
+                DriverProfile.last_cancellation_reset <= cutoff_time,
+                DriverProfile.cancellation_count >= 3
+            )
+        ]
         
         if unsuspended_drivers:
+            # Unsuspend drivers and reset cancellation counts with a single UPDATE
+            self.db.query(DriverProfile).filter(
+                DriverProfile.driver_id.in_(unsuspended_drivers)
+            ).update({
+                DriverProfile.is_suspended: False,
+                DriverProfile.cancellation_count: 0,
+                DriverProfile.last_cancellation_reset: now
+            }, synchronize_session=False)
             self.db.commit()
         
         return unsuspended_drivers
@@ -172,34 +194,76 @@ class BackgroundJobService:
         Reset daily availability hours for all drivers.
         Should be run at midnight daily.
         
+        Returns:
+            Number of drivers reset
+        """
+        # Reset daily hours to 0 for every driver in one UPDATE
+        count = self.db.query(DriverProfile).update(
+            self._availability_reset_values(datetime.utcnow()),
+            synchronize_session=False
+        )
+        
+        if count > 0:
+            self.db.commit()
+        
+        return count
+    
+    def reset_daily_counters(self) -> int:
+        """
+        Reset daily cancellation counts and availability hours for all drivers
+        in a single UPDATE, instead of one table sweep per counter.
+        Should be run at midnight daily in place of reset_daily_cancellation_counts
+        and reset_daily_availability_hours.
+        
         Returns:
             Number of drivers reset
         """
         now = datetime.utcnow()
-        count = 0
-        
-        # Get all driver profiles
-        drivers = self.db.query(DriverProfile).all()
-        
-        for driver_profile in drivers:
-            # If driver is currently available, calculate and accumulate current session hours
-            if driver_profile.availability_start_time and driver_profile.status == DriverStatus.AVAILABLE:
-                time_diff = now - driver_profile.availability_start_time
-                hours_accumulated = time_diff.total_seconds() / 3600
-                driver_profile.daily_availability_hours += hours_accumulated
-                
-                # Reset start time to now (beginning of new day)
-                driver_profile.availability_start_time = now
-            
-            # Reset daily hours to 0
-            driver_profile.daily_availability_hours = 0.0
-            count += 1
+        
+        # Only drivers who had cancellations get a new reset time, as in
+        # reset_daily_cancellation_counts
+        count = self.db.query(DriverProfile).update({
+            **self._availability_reset_values(now),
+            DriverProfile.cancellation_count: 0,
+            DriverProfile.last_cancellation_reset: case(
+                (DriverProfile.cancellation_count > 0, now),
+                else_=DriverProfile.last_cancellation_reset
+            )
+        }, synchronize_session=False)
         
         if count > 0:
             self.db.commit()
         
         return count
     
+    @staticmethod
+    def _availability_reset_values(now: datetime) -> dict:
+        """
+        Build the UPDATE values that reset daily availability hours.
+        
+        Drivers who are currently available start a new session at the
+        beginning of the new day.
+        
+        Args:
+            now: Time of the reset
+        
+        Returns:
+            Column to value mapping for Query.update
+        """
+        return {
+            DriverProfile.daily_availability_hours: 0.0,
+            DriverProfile.availability_start_time: case(
+                (
+                    and_(
+                        DriverProfile.availability_start_time.isnot(None),
+                        DriverProfile.status == DriverStatus.AVAILABLE
+                    ),
+                    now
+                ),
+                else_=DriverProfile.availability_start_time
+            )
+        }
+    
     def process_scheduled_rides(
         self,
         matching_service=None,
@@ -221,8 +285,6 @@ class BackgroundJobService:
         Requirements: 16.5, 16.9, 16.10, 16.11
         """
         try:
-            from app.services.scheduled_ride_service import ScheduledRideService
-            
             # Create service instance
             scheduled_service = ScheduledRideService(
                 self.db,
@@ -233,7 +295,7 @@ class BackgroundJobService:
             # Process rides
             return scheduled_service.process_scheduled_rides()
         except Exception as e:
-            print(f"Error processing scheduled rides: {str(e)}")
+            logger.exception("Error processing scheduled rides")
             return {
                 "matching_triggered": 0,
                 "rider_reminders_sent": 0,
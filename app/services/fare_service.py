@@ -5,11 +5,12 @@ This module implements fare calculation logic for the ride-hailing platform.
 Validates Requirements: 5.1, 5.2, 5.3, 5.4, 5.5, 5.6
 """
 
-from typing import Dict, Optional
-from pydantic import BaseModel
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
 
 
-class FareBreakdown(BaseModel):
+@dataclass(slots=True, frozen=True)
+class FareBreakdown:
     """Detailed breakdown of fare components"""
     base: float  # Base fare in ₹
     per_km: float  # Rate per kilometer in ₹
@@ -17,7 +18,8 @@ class FareBreakdown(BaseModel):
     surge: float  # Surge multiplier
 
 
-class FareCalculation(BaseModel):
+@dataclass(slots=True, frozen=True)
+class FareCalculation:
     """Complete fare calculation result"""
     base_fare: float  # Base fare component
     distance_charge: float  # Distance-based charge
@@ -31,6 +33,30 @@ BASE_FARE = 30.0  # ₹30 base fare
 PER_KM_RATE_STANDARD = 12.0  # ₹12 per kilometer for first 25km
 PER_KM_RATE_EXTENDED = 10.0  # ₹10 per kilometer beyond 25km
 DISTANCE_TIER_THRESHOLD = 25.0  # Distance threshold for tiered pricing in km
+STANDARD_TIER_CHARGE = DISTANCE_TIER_THRESHOLD * PER_KM_RATE_STANDARD  # ₹300 for the first 25km
+
+
+def _distance_charge(distance_km: float) -> Tuple[float, float]:
+    """
+    Apply tiered per-km pricing to a distance.
+    
+    Args:
+        distance_km: Distance in kilometers
+    
+    Returns:
+        Tuple of (distance charge, per-km rate for the breakdown)
+    """
+    if distance_km <= DISTANCE_TIER_THRESHOLD:
+        # Standard rate for distances up to 25km
+        return distance_km * PER_KM_RATE_STANDARD, PER_KM_RATE_STANDARD
+    
+    # Tiered rate: first 25km at standard rate, rest at extended rate
+    standard_distance_charge = STANDARD_TIER_CHARGE
+    extended_distance = distance_km - DISTANCE_TIER_THRESHOLD
+    extended_distance_charge = extended_distance * PER_KM_RATE_EXTENDED
+    distance_charge = standard_distance_charge + extended_distance_charge
+    # Use blended rate for breakdown display
+    return distance_charge, distance_charge / distance_km
 
 
 def calculate_estimated_fare(
@@ -55,19 +81,7 @@ def calculate_estimated_fare(
     """
     # Calculate base components with tiered pricing
     base_fare = BASE_FARE
-    
-    if distance_km <= DISTANCE_TIER_THRESHOLD:
-        # Standard rate for distances up to 25km
-        distance_charge = distance_km * PER_KM_RATE_STANDARD
-        per_km_rate = PER_KM_RATE_STANDARD
-    else:
-        # Tiered rate: first 25km at standard rate, rest at extended rate
-        standard_distance_charge = DISTANCE_TIER_THRESHOLD * PER_KM_RATE_STANDARD
-        extended_distance = distance_km - DISTANCE_TIER_THRESHOLD
-        extended_distance_charge = extended_distance * PER_KM_RATE_EXTENDED
-        distance_charge = standard_distance_charge + extended_distance_charge
-        # Use blended rate for breakdown display
-        per_km_rate = distance_charge / distance_km
+    distance_charge, per_km_rate = _distance_charge(distance_km)
     
     # Apply surge multiplier to total
     subtotal = base_fare + distance_charge
@@ -113,19 +127,7 @@ def calculate_final_fare(
     """
     # Calculate fare based on actual distance with tiered pricing
     base_fare = BASE_FARE
-    
-    if actual_distance_km <= DISTANCE_TIER_THRESHOLD:
-        # Standard rate for distances up to 25km
-        distance_charge = actual_distance_km * PER_KM_RATE_STANDARD
-        per_km_rate = PER_KM_RATE_STANDARD
-    else:
-        # Tiered rate: first 25km at standard rate, rest at extended rate
-        standard_distance_charge = DISTANCE_TIER_THRESHOLD * PER_KM_RATE_STANDARD
-        extended_distance = actual_distance_km - DISTANCE_TIER_THRESHOLD
-        extended_distance_charge = extended_distance * PER_KM_RATE_EXTENDED
-        distance_charge = standard_distance_charge + extended_distance_charge
-        # Use blended rate for breakdown display
-        per_km_rate = distance_charge / actual_distance_km
+    distance_charge, per_km_rate = _distance_charge(actual_distance_km)
     
     subtotal = base_fare + distance_charge
     actual_fare = subtotal * surge_multiplier
@@ -156,6 +158,32 @@ def calculate_final_fare(
     )
 
 
+def calculate_estimated_fare_totals(
+    distances_km: Sequence[float],
+    surge_multipliers: Sequence[float]
+) -> List[float]:
+    """
+    Calculate estimated total fares for many rides at once.
+    
+    Uses the same tiered formula as calculate_estimated_fare but returns only
+    the rounded totals, without building a FareCalculation per ride. Intended
+    for batch jobs such as surge recomputation that only need totals.
+    
+    Args:
+        distances_km: Distance of each ride in kilometers
+        surge_multipliers: Surge multiplier of each ride
+    
+    Returns:
+        Total fare of each ride, in input order
+    
+    Validates: Requirements 5.2, 5.3, 5.6, 18.4, 18.9
+    """
+    return [
+        round((BASE_FARE + _distance_charge(distance_km)[0]) * surge_multiplier, 2)
+        for distance_km, surge_multiplier in zip(distances_km, surge_multipliers, strict=True)
+    ]
+
+
 def get_fare_summary(fare_calculation: FareCalculation) -> Dict[str, float]:
     """
     Get a simple summary of fare components for display.
@@ -187,8 +215,15 @@ PARCEL_PER_KM_RATE = {
     "large": 12.0    # ₹12 per km for large parcels
 }
 
+# (base fare, per km rate) by parcel size, so a fare needs one lookup
+_PARCEL_RATES: Dict[str, Tuple[float, float]] = {
+    size: (PARCEL_BASE_FARE[size], PARCEL_PER_KM_RATE[size])
+    for size in PARCEL_BASE_FARE
+}
+
 
-class ParcelFareBreakdown(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ParcelFareBreakdown:
     """Detailed breakdown of parcel delivery fare components"""
     base: float  # Base fare based on size
     per_km: float  # Rate per kilometer based on size
@@ -196,7 +231,8 @@ class ParcelFareBreakdown(BaseModel):
     size: str  # Parcel size (small/medium/large)
 
 
-class ParcelFareCalculation(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ParcelFareCalculation:
     """Complete parcel fare calculation result"""
     base_fare: float  # Base fare component
     distance_charge: float  # Distance-based charge
@@ -227,13 +263,11 @@ def calculate_parcel_fare(
     
     Validates: Requirements 17.4, 17.5, 17.6
     """
-    # Validate parcel size
-    if parcel_size not in PARCEL_BASE_FARE:
+    # Get size-specific rates, validating parcel size
+    rates = _PARCEL_RATES.get(parcel_size)
+    if rates is None:
         raise ValueError(f"Invalid parcel size: {parcel_size}. Must be small, medium, or large.")
-    
-    # Get size-specific rates
-    base_fare = PARCEL_BASE_FARE[parcel_size]
-    per_km_rate = PARCEL_PER_KM_RATE[parcel_size]
+    base_fare, per_km_rate = rates
     
     # Calculate distance charge
     distance_charge = distance_km * per_km_rate
@@ -257,6 +291,37 @@ def calculate_parcel_fare(
     )
 
 
+def calculate_parcel_fare_totals(
+    distances_km: Sequence[float],
+    parcel_sizes: Sequence[str]
+) -> List[float]:
+    """
+    Calculate total parcel delivery fares for many deliveries at once.
+    
+    Uses the same formula as calculate_parcel_fare but returns only the
+    rounded totals, without building a ParcelFareCalculation per delivery.
+    
+    Args:
+        distances_km: Distance of each delivery in kilometers
+        parcel_sizes: Size of each parcel (small, medium, large)
+    
+    Returns:
+        Total fare of each delivery, in input order
+    
+    Raises:
+        ValueError: If any parcel size is invalid
+    
+    Validates: Requirements 17.4, 17.5, 17.6
+    """
+    totals = []
+    for distance_km, parcel_size in zip(distances_km, parcel_sizes, strict=True):
+        rates = _PARCEL_RATES.get(parcel_size)
+        if rates is None:
+            raise ValueError(f"Invalid parcel size: {parcel_size}. Must be small, medium, or large.")
+        totals.append(round(rates[0] + distance_km * rates[1], 2))
+    return totals
+
+
 def estimate_delivery_time(distance_km: float) -> int:
     """
     Estimate delivery time in minutes based on distance.
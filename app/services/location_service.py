@@ -2,12 +2,15 @@
 Location Service for managing driver locations and geospatial queries.
 Handles MongoDB operations for location tracking.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import logging
 import math
+import time
 import googlemaps
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
-from pymongo import GEOSPHERE, ASCENDING, DESCENDING
+from pymongo import GEOSPHERE, ASCENDING, IndexModel
 from pymongo.errors import CollectionInvalid
 
 from app.models.location import (
@@ -15,12 +18,76 @@ from app.models.location import (
     LocationHistory,
     LOCATIONS_COLLECTION,
     LOCATION_HISTORY_COLLECTION,
+    LOCATION_HISTORY_BUCKETS_COLLECTION,
+    CURRENT_LOCATIONS_COLLECTION,
     LOCATION_INDEXES,
-    LOCATION_HISTORY_INDEXES
+    LOCATION_HISTORY_INDEXES,
+    LOCATION_HISTORY_BUCKET_INDEXES,
+    CURRENT_LOCATION_INDEXES
 )
 from app.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+# Mean Earth radius used by the Haversine formula
+EARTH_RADIUS_KM = 6371.0
+
+# Geohash base32 alphabet and the size in degrees of a 6 character cell
+# (30 bits: 15 for longitude, 15 for latitude, roughly 1.2km x 0.6km)
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH6_LAT_STEP = 180.0 / (1 << 15)
+_GEOHASH6_LON_STEP = 360.0 / (1 << 15)
+
+
+def _geohash6(latitude: float, longitude: float) -> str:
+    """
+    Encode a point as a 6 character geohash.
+    
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        
+    Returns:
+        Geohash string of length 6
+    """
+    # Cell indexes along each axis, clamped so the maximum edge stays inside
+    lat_bits = min(int((latitude + 90.0) / _GEOHASH6_LAT_STEP), (1 << 15) - 1)
+    lon_bits = min(int((longitude + 180.0) / _GEOHASH6_LON_STEP), (1 << 15) - 1)
+    
+    # Interleave bits, longitude first, most significant bit first
+    code = 0
+    for i in range(14, -1, -1):
+        code = (code << 2) | (((lon_bits >> i) & 1) << 1) | ((lat_bits >> i) & 1)
+    
+    return "".join(
+        _GEOHASH_BASE32[(code >> shift) & 31] for shift in range(25, -1, -5)
+    )
+
+
+def _geohash6_neighbors(latitude: float, longitude: float, ring: int = 1) -> List[str]:
+    """
+    Geohash cells covering a point and `ring` cells around it on each side.
+    
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        ring: Number of cells to expand in each direction
+        
+    Returns:
+        Distinct 6 character geohashes, the center cell first
+    """
+    cells = {}
+    for dlat in range(-ring, ring + 1):
+        for dlon in range(-ring, ring + 1):
+            lat = max(-90.0, min(90.0, latitude + dlat * _GEOHASH6_LAT_STEP))
+            lon = (longitude + dlon * _GEOHASH6_LON_STEP + 180.0) % 360.0 - 180.0
+            cells.setdefault(_geohash6(lat, lon), None)
+    
+    center = _geohash6(latitude, longitude)
+    return [center] + [cell for cell in cells if cell != center]
+
+
 def calculate_distance(
     lat1: float, 
     lon1: float, 
@@ -42,27 +109,145 @@ def calculate_distance(
     Returns:
         Distance in kilometers
     """
-    # Earth's radius in kilometers
-    R = 6371.0
-    
     # Convert degrees to radians
     lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
     lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
     
     # Differences
     dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
+    dlon = math.radians(lon2) - math.radians(lon1)
     
     # Haversine formula
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    a = math.sin(dlat * 0.5)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon * 0.5)**2
+    # 2*asin(sqrt(a)) equals 2*atan2(sqrt(a), sqrt(1 - a)) with one fewer
+    # sqrt; `a` is capped at 1 since rounding can push it just above for
+    # antipodal points
+    if a > 1.0:
+        a = 1.0
+    c = 2 * math.asin(math.sqrt(a))
     
     # Distance in kilometers
-    distance = R * c
+    return EARTH_RADIUS_KM * c
+
+
+class ResponseCache:
+    """
+    Size-bounded cache of external API responses with a per-entry TTL.
+    
+    When full, the oldest entry is evicted. Cached values are shared
+    between callers and must not be mutated.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+    
+    def get(self, key: Any) -> Any:
+        """Return the cached value for a key, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+    
+    def set(self, key: Any, value: Any) -> None:
+        """Cache a value for a key."""
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.maxsize:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+    
+    def clear(self) -> None:
+        """Remove all cached values."""
+        self._entries.clear()
+
+
+# Google Maps responses shared across requests. Geocoding results for a
+# place rarely change; routes depend on traffic, so they expire quickly
+geocode_cache = ResponseCache(maxsize=4096, ttl_seconds=24 * 60 * 60)
+directions_cache = ResponseCache(maxsize=4096, ttl_seconds=60)
+
+
+class LocationWriteBatcher:
+    """
+    Coalesces driver location log inserts into periodic insert_many calls.
+    
+    Heartbeats arrive from every online driver about once a second; writing
+    them in batches turns one round trip per heartbeat into one per flush
+    interval. Only the append-only location log is batched.
+    """
+    
+    # Seconds between flushes and maximum documents per insert_many
+    FLUSH_INTERVAL = 0.05
+    MAX_BATCH_SIZE = 500
+    
+    def __init__(self):
+        self._collection: Optional[AsyncIOMotorCollection] = None
+        self._pending: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether the batcher is accepting documents."""
+        return self._task is not None
+    
+    def start(self, collection: AsyncIOMotorCollection) -> None:
+        """
+        Start flushing buffered documents into a collection.
+        
+        Args:
+            collection: Location log collection to insert into
+        """
+        if self._task is not None:
+            return
+        
+        self._collection = collection
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("Location write batcher started")
+    
+    async def stop(self) -> None:
+        """Stop the batcher and write any buffered documents."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        while self._pending:
+            await self._flush()
+    
+    def submit(self, doc: dict) -> None:
+        """Buffer a location document for the next flush."""
+        self._pending.append(doc)
+    
+    async def _flush_loop(self) -> None:
+        """Flush buffered documents every FLUSH_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            while self._pending:
+                await self._flush()
     
-    return distance
+    async def _flush(self) -> None:
+        """Insert up to MAX_BATCH_SIZE buffered documents."""
+        batch = self._pending[:self.MAX_BATCH_SIZE]
+        del self._pending[:self.MAX_BATCH_SIZE]
+        
+        try:
+            await self._collection.insert_many(batch, ordered=False)
+        except Exception:
+            logger.exception("Failed to write %d driver locations", len(batch))
+
+
+# Shared by all LocationService instances in the process; started on
+# application startup
+location_write_batcher = LocationWriteBatcher()
 
 
 class LocationService:
@@ -91,6 +276,30 @@ class LocationService:
     # Legacy boundary for backward compatibility
     INDORE_BOUNDARY = CITY_LIMITS
     
+    # Fields read from stored driver locations; excluding _id also keeps
+    # MongoDB ObjectIds out of the string location_id field
+    _DRIVER_LOCATION_PROJECTION = {
+        "_id": 0,
+        "user_id": 1,
+        "user_type": 1,
+        "location": 1,
+        "address": 1,
+        "status": 1,
+        "accuracy": 1,
+        "timestamp": 1
+    }
+    
+    # Cosine of the city center latitude, used to scale longitude differences
+    # in the equirectangular distance from the center
+    _COS_CENTER_LAT = math.cos(math.radians(CITY_CENTER_LAT))
+    
+    # Half-widths in degrees of the box enclosing the service area circle, and
+    # of the square inscribed in it, for quick accept/reject checks
+    _SERVICE_AREA_DLAT = math.degrees(SERVICE_AREA_RADIUS_KM / EARTH_RADIUS_KM)
+    _SERVICE_AREA_DLON = _SERVICE_AREA_DLAT / _COS_CENTER_LAT
+    _INNER_DLAT = _SERVICE_AREA_DLAT / math.sqrt(2)
+    _INNER_DLON = _SERVICE_AREA_DLON / math.sqrt(2)
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         """
         Initialize LocationService with MongoDB database.
@@ -101,6 +310,8 @@ class LocationService:
         self.db = db
         self.locations: AsyncIOMotorCollection = db[LOCATIONS_COLLECTION]
         self.location_history: AsyncIOMotorCollection = db[LOCATION_HISTORY_COLLECTION]
+        self.location_history_buckets: AsyncIOMotorCollection = db[LOCATION_HISTORY_BUCKETS_COLLECTION]
+        self.current_locations: AsyncIOMotorCollection = db[CURRENT_LOCATIONS_COLLECTION]
         
         # Initialize Google Maps client
         self.gmaps_client = None
@@ -112,27 +323,31 @@ class LocationService:
         Create MongoDB indexes for geospatial queries and performance.
         Should be called once during application startup.
         """
-        # Create indexes for locations collection
-        for index_spec in LOCATION_INDEXES:
-            await self.locations.create_index(
-                index_spec["keys"],
-                name=index_spec["name"],
-                background=index_spec.get("background", True),
-                unique=index_spec.get("unique", False),
-                expireAfterSeconds=index_spec.get("expireAfterSeconds")
-            )
-        
-        # Create indexes for location_history collection
-        for index_spec in LOCATION_HISTORY_INDEXES:
-            await self.location_history.create_index(
-                index_spec["keys"],
-                name=index_spec["name"],
-                background=index_spec.get("background", True),
-                unique=index_spec.get("unique", False)
-            )
+        # One createIndexes command per collection, all sent concurrently
+        await asyncio.gather(
+            self.locations.create_indexes(self._index_models(LOCATION_INDEXES)),
+            self.current_locations.create_indexes(self._index_models(CURRENT_LOCATION_INDEXES)),
+            self.location_history.create_indexes(self._index_models(LOCATION_HISTORY_INDEXES)),
+            self.location_history_buckets.create_indexes(self._index_models(LOCATION_HISTORY_BUCKET_INDEXES))
+        )
         
         print("MongoDB location indexes created successfully")
     
+    @staticmethod
+    def _index_models(index_specs: List[Dict[str, Any]]) -> List[IndexModel]:
+        """Build IndexModels from index specs in app.models.location."""
+        models = []
+        for index_spec in index_specs:
+            options = {
+                "name": index_spec["name"],
+                "background": index_spec.get("background", True),
+                "unique": index_spec.get("unique", False)
+            }
+            if "expireAfterSeconds" in index_spec:
+                options["expireAfterSeconds"] = index_spec["expireAfterSeconds"]
+            models.append(IndexModel(index_spec["keys"], **options))
+        return models
+    
     def is_within_service_area(self, latitude: float, longitude: float) -> bool:
         """
         Check if a location is within the expanded service area (20km radius from city center).
@@ -146,12 +361,18 @@ class LocationService:
             
         Requirements: 2.4, 13.6, 18.1, 18.2
         """
-        distance_from_center = self.calculate_distance(
-            self.CITY_CENTER_LAT,
-            self.CITY_CENTER_LON,
-            latitude,
-            longitude
-        )
+        dlat = abs(latitude - self.CITY_CENTER_LAT)
+        dlon = abs(longitude - self.CITY_CENTER_LON)
+        
+        # Outside the box around the circle: too far in one direction alone
+        if dlat > self._SERVICE_AREA_DLAT or dlon > self._SERVICE_AREA_DLON:
+            return False
+        
+        # Inside the square inscribed in the circle
+        if dlat <= self._INNER_DLAT and dlon <= self._INNER_DLON:
+            return True
+        
+        distance_from_center = self._distance_from_center(latitude, longitude)
         return distance_from_center <= self.SERVICE_AREA_RADIUS_KM
     
     def is_in_extended_area(self, latitude: float, longitude: float) -> bool:
@@ -171,17 +392,48 @@ class LocationService:
             
         Requirements: 18.2, 18.3
         """
-        # Check if within service area
-        in_service_area = self.is_within_service_area(latitude, longitude)
+        # Extended area = in service area but not in city limits; the cheap
+        # city limits check goes first
+        return (
+            not self._in_city_limits(latitude, longitude) and
+            self.is_within_service_area(latitude, longitude)
+        )
+    
+    def _in_city_limits(self, latitude: float, longitude: float) -> bool:
+        """
+        Check if a location is within the original rectangular city limits.
         
-        # Check if within city limits
-        in_city_limits = (
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            
+        Returns:
+            True if location is within city limits, False otherwise
+        """
+        return (
             self.CITY_LIMITS["min_latitude"] <= latitude <= self.CITY_LIMITS["max_latitude"] and
             self.CITY_LIMITS["min_longitude"] <= longitude <= self.CITY_LIMITS["max_longitude"]
         )
+    
+    def _distance_from_center(self, latitude: float, longitude: float) -> float:
+        """
+        Calculate the approximate distance of a point from the city center.
+        
+        Uses the equirectangular approximation, which skips the Haversine trig
+        and stays within about 5 meters of the Haversine distance at the 20km
+        service area radius.
         
-        # Extended area = in service area but not in city limits
-        return in_service_area and not in_city_limits
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            
+        Returns:
+            Distance in kilometers
+        """
+        return EARTH_RADIUS_KM * math.hypot(
+            math.radians(latitude - self.CITY_CENTER_LAT),
+            self._COS_CENTER_LAT * math.radians(longitude - self.CITY_CENTER_LON)
+        )
     
     def calculate_distance(
         self, 
@@ -208,27 +460,7 @@ class LocationService:
             
         Requirements: 5.1, 5.2
         """
-        # Earth's radius in kilometers
-        R = 6371.0
-        
-        # Convert degrees to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # Differences
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        # Haversine formula
-        a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        # Distance in kilometers
-        distance = R * c
-        
-        return distance
+        return calculate_distance(lat1, lon1, lat2, lon2)
     
     def validate_location_boundaries(self, latitude: float, longitude: float) -> dict:
         """
@@ -252,15 +484,11 @@ class LocationService:
             
         Requirements: 2.4, 13.6, 18.1, 18.2, 18.3, 18.8
         """
-        distance_from_center = self.calculate_distance(
-            self.CITY_CENTER_LAT,
-            self.CITY_CENTER_LON,
-            latitude,
-            longitude
-        )
+        distance_from_center = self._distance_from_center(latitude, longitude)
         
-        is_valid = self.is_within_service_area(latitude, longitude)
-        is_extended = self.is_in_extended_area(latitude, longitude)
+        # Classify from the one distance computed above
+        is_valid = distance_from_center <= self.SERVICE_AREA_RADIUS_KM
+        is_extended = is_valid and not self._in_city_limits(latitude, longitude)
         
         if is_valid:
             if is_extended:
@@ -288,6 +516,42 @@ class LocationService:
                 "longitude": longitude
             }
     
+    def validate_locations_bulk(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float]
+    ) -> Tuple[List[float], List[bool], List[bool]]:
+        """
+        Classify many locations against the service boundaries at once.
+        
+        Applies the same rules as validate_location_boundaries without
+        building a result dict and message per location, for batch checks
+        such as vetting a window of driver heartbeats.
+        
+        Args:
+            latitudes: Latitude of each location
+            longitudes: Longitude of each location, in the same order
+            
+        Returns:
+            Tuple of (distance from center in km, in service area,
+            in extended area) lists, in input order
+            
+        Requirements: 18.1, 18.2, 18.3
+        """
+        distances = []
+        in_service_area = []
+        in_extended_area = []
+        
+        for latitude, longitude in zip(latitudes, longitudes, strict=True):
+            distance_from_center = self._distance_from_center(latitude, longitude)
+            is_valid = distance_from_center <= self.SERVICE_AREA_RADIUS_KM
+            
+            distances.append(distance_from_center)
+            in_service_area.append(is_valid)
+            in_extended_area.append(is_valid and not self._in_city_limits(latitude, longitude))
+        
+        return distances, in_service_area, in_extended_area
+    
     async def update_driver_location(
         self, 
         driver_id: str, 
@@ -321,11 +585,37 @@ class LocationService:
             address=address,
             status=status,
             accuracy=accuracy,
-            timestamp=datetime.utcnow()
+            timestamp=datetime.utcnow(),
+            geohash6=_geohash6(latitude, longitude)
         )
         
-        # Insert location document
-        await self.locations.insert_one(location.to_dict())
+        # Serialize once; inserts add an _id to the dict they are given,
+        # so they receive a copy
+        doc = location.to_dict()
+        
+        # Append to the location log, batched with other drivers' updates
+        # when the application has started the batcher
+        if location_write_batcher.running:
+            location_write_batcher.submit(dict(doc))
+        else:
+            await self.locations.insert_one(dict(doc))
+        
+        # Update the driver's current location used by nearby searches.
+        # Only the status carries over from earlier updates, so a heartbeat
+        # without one keeps the driver's last known status; an address or
+        # accuracy this update lacks is cleared rather than left attached
+        # to the new coordinates
+        update: Dict[str, Any] = {"$set": doc}
+        stale_fields = {
+            field: "" for field in ("address", "accuracy") if field not in doc
+        }
+        if stale_fields:
+            update["$unset"] = stale_fields
+        await self.current_locations.update_one(
+            {"user_id": driver_id},
+            update,
+            upsert=True
+        )
         
         return location
     
@@ -341,15 +631,47 @@ class LocationService:
             
         Requirements: 8.1
         """
-        doc = await self.locations.find_one(
+        # The current locations collection is written on every update,
+        # including while location log inserts are still buffered
+        doc = await self.current_locations.find_one(
             {"user_id": driver_id, "user_type": "driver"},
-            sort=[("timestamp", DESCENDING)]
+            self._DRIVER_LOCATION_PROJECTION
         )
         
         if doc:
-            return Location(**doc)
+            return Location.from_document(doc)
         return None
     
+    async def get_driver_locations_bulk(self, driver_ids: List[str]) -> Dict[str, Location]:
+        """
+        Get the most recent location for each of several drivers in one query.
+        
+        Args:
+            driver_ids: Driver user IDs
+            
+        Returns:
+            Dict mapping driver ID to its most recent Location; drivers with
+            no stored location are omitted
+            
+        Requirements: 8.1
+        """
+        if not driver_ids:
+            return {}
+        
+        # One current location document per driver, so no sort or group
+        # over the location log is needed
+        cursor = self.current_locations.find(
+            {"user_id": {"$in": list(driver_ids)}, "user_type": "driver"},
+            self._DRIVER_LOCATION_PROJECTION
+        )
+        
+        locations = {}
+        async for doc in cursor:
+            location = Location.from_document(doc)
+            locations[location.user_id] = location
+        
+        return locations
+    
     async def get_available_drivers_nearby(
         self, 
         latitude: float, 
@@ -375,16 +697,17 @@ class LocationService:
         # Convert km to meters for MongoDB query
         radius_meters = radius_km * 1000
         
-        # Get the most recent location for each driver
-        # First, get all recent driver locations within radius
+        # Search the current locations collection, which holds only the most
+        # recent location of each driver, so no per-driver grouping is needed
+        # and $geoNear returns results sorted by distance
         pipeline = [
-            # Match locations within radius
             {
                 "$geoNear": {
                     "near": {
                         "type": "Point",
                         "coordinates": [longitude, latitude]
                     },
+                    "key": "location",
                     "distanceField": "distance",
                     "maxDistance": radius_meters,
                     "query": {
@@ -394,30 +717,50 @@ class LocationService:
                     "spherical": True
                 }
             },
-            # Sort by timestamp descending to get most recent
-            {"$sort": {"user_id": 1, "timestamp": -1}},
-            # Group by user_id to get only the most recent location per driver
-            {
-                "$group": {
-                    "_id": "$user_id",
-                    "location": {"$first": "$$ROOT"}
-                }
-            },
-            # Replace root with the location document
-            {"$replaceRoot": {"newRoot": "$location"}},
-            # Sort by distance
-            {"$sort": {"distance": 1}},
             # Limit results
-            {"$limit": limit}
+            {"$limit": limit},
+            {"$project": self._DRIVER_LOCATION_PROJECTION}
         ]
         
-        cursor = self.locations.aggregate(pipeline)
-        locations = []
+        # Fetch all results in the first batch rather than the default of 101
+        # documents, then drain the cursor in one call
+        cursor = self.current_locations.aggregate(pipeline, batchSize=limit)
+        docs = await cursor.to_list(length=limit)
         
-        async for doc in cursor:
-            locations.append(Location(**doc))
+        return [Location.from_document(doc) for doc in docs]
+    
+    async def get_available_drivers_by_cell(
+        self,
+        latitude: float,
+        longitude: float,
+        ring: int = 1,
+        limit: int = 50
+    ) -> List[Location]:
+        """
+        Find available drivers in the geohash cells around a point.
         
-        return locations
+        An equality lookup on the geohash6 field over the center cell and its
+        neighbours, suited to short-range searches of about a kilometre.
+        Results are not ordered by distance; use get_available_drivers_nearby
+        for larger or distance-sorted searches.
+        
+        Args:
+            latitude: Search center latitude
+            longitude: Search center longitude
+            ring: Number of neighbouring cells to include in each direction
+            limit: Maximum number of drivers to return
+            
+        Returns:
+            List of Location objects for available drivers
+        """
+        cursor = self.current_locations.find({
+            "geohash6": {"$in": _geohash6_neighbors(latitude, longitude, ring)},
+            "user_type": "driver",
+            "status": "available"
+        }, self._DRIVER_LOCATION_PROJECTION).limit(limit).batch_size(limit)
+        docs = await cursor.to_list(length=limit)
+        
+        return [Location.from_document(doc) for doc in docs]
     
     async def start_location_history(
         self, 
@@ -453,18 +796,33 @@ class LocationService:
         """
         Add a location point to ride history.
         
+        Points are appended to a per-minute bucket document rather than to
+        the ride's history document, so each write touches a small document
+        and long rides cannot approach MongoDB's document size limit.
+        
         Args:
             ride_id: Ride ID
             location: Location object to add
             
         Requirements: 8.5
         """
-        await self.location_history.update_one(
-            {"ride_id": ride_id},
-            {
-                "$push": {"locations": location.to_dict()},
-                "$set": {"ended_at": datetime.utcnow()}
-            }
+        bucket_minute = int(time.time() // 60)
+        
+        # The bucket write and the history's ended_at are independent, so
+        # they are sent together rather than one after the other
+        await asyncio.gather(
+            self.location_history_buckets.update_one(
+                {"ride_id": ride_id, "bucket_minute": bucket_minute},
+                {
+                    "$push": {"points": location.to_dict()},
+                    "$setOnInsert": {"driver_id": location.user_id}
+                },
+                upsert=True
+            ),
+            self.location_history.update_one(
+                {"ride_id": ride_id},
+                {"$set": {"ended_at": datetime.utcnow()}}
+            )
         )
     
     async def get_location_history(self, ride_id: str) -> Optional[LocationHistory]:
@@ -481,9 +839,21 @@ class LocationService:
         """
         doc = await self.location_history.find_one({"ride_id": ride_id})
         
-        if doc:
-            return LocationHistory(**doc)
-        return None
+        if not doc:
+            return None
+        
+        # Reassemble the route from the ride's buckets in time order
+        cursor = self.location_history_buckets.find(
+            {"ride_id": ride_id},
+            {"points": 1, "_id": 0}
+        ).sort("bucket_minute", 1)
+        
+        locations = doc.get("locations", [])
+        async for bucket in cursor:
+            locations.extend(bucket["points"])
+        doc["locations"] = locations
+        
+        return LocationHistory(**doc)
     
     async def delete_old_locations(self, days: int = 1):
         """
@@ -499,7 +869,7 @@ class LocationService:
         )
         return result.deleted_count
     
-    def search_address(
+    async def search_address(
         self, 
         query: str, 
         limit: int = 5
@@ -507,6 +877,7 @@ class LocationService:
         """
         Search for addresses using Google Maps Geocoding API.
         Filters results to only return locations within Indore service area.
+        The blocking googlemaps call runs in a worker thread.
         
         Args:
             query: Address search query string
@@ -535,26 +906,35 @@ class LocationService:
             "lng": (self.INDORE_BOUNDARY["min_longitude"] + self.INDORE_BOUNDARY["max_longitude"]) / 2
         }
         
+        # Normalize case and whitespace so equivalent queries share a
+        # cache entry; geocoding is case-insensitive
+        query = " ".join(query.lower().split())
+        
         # Add "Indore" to query if not already present
-        if "indore" not in query.lower():
-            query = f"{query}, Indore"
+        if "indore" not in query:
+            query = f"{query}, indore"
         
         try:
-            # Call Google Maps Geocoding API
-            geocode_result = self.gmaps_client.geocode(
-                query,
-                region="in",  # Bias to India
-                bounds={
-                    "northeast": {
-                        "lat": self.INDORE_BOUNDARY["max_latitude"],
-                        "lng": self.INDORE_BOUNDARY["max_longitude"]
-                    },
-                    "southwest": {
-                        "lat": self.INDORE_BOUNDARY["min_latitude"],
-                        "lng": self.INDORE_BOUNDARY["min_longitude"]
+            geocode_result = geocode_cache.get(query)
+            if geocode_result is None:
+                # Call Google Maps Geocoding API
+                geocode_result = await asyncio.to_thread(
+                    self.gmaps_client.geocode,
+                    query,
+                    region="in",  # Bias to India
+                    bounds={
+                        "northeast": {
+                            "lat": self.INDORE_BOUNDARY["max_latitude"],
+                            "lng": self.INDORE_BOUNDARY["max_longitude"]
+                        },
+                        "southwest": {
+                            "lat": self.INDORE_BOUNDARY["min_latitude"],
+                            "lng": self.INDORE_BOUNDARY["min_longitude"]
+                        }
                     }
-                }
-            )
+                )
+                if geocode_result:
+                    geocode_cache.set(query, geocode_result)
             
             # Filter results to only include locations within service area
             filtered_results = []
@@ -582,22 +962,27 @@ class LocationService:
             print(f"Error searching address: {e}")
             return []
     
-    def calculate_route(
+    async def calculate_route(
         self,
         origin_lat: float,
         origin_lng: float,
         dest_lat: float,
-        dest_lng: float
+        dest_lng: float,
+        use_live_traffic: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Calculate route between two points using Google Maps Directions API.
         Returns route with polyline, distance, and duration.
+        The blocking googlemaps call runs in a worker thread.
         
         Args:
             origin_lat: Origin latitude
             origin_lng: Origin longitude
             dest_lat: Destination latitude
             dest_lng: Destination longitude
+            use_live_traffic: Whether the duration should reflect current
+                traffic; callers that only need the route and distance can
+                pass False for a cheaper request
             
         Returns:
             Dictionary with route information:
@@ -615,18 +1000,38 @@ class LocationService:
         if not self.gmaps_client:
             raise ValueError("Google Maps API key not configured")
         
+        # Round to 4 decimal places (about 11m) so nearby requests share
+        # a cache entry
+        origin = (round(origin_lat, 4), round(origin_lng, 4))
+        destination = (round(dest_lat, 4), round(dest_lng, 4))
+        
+        cache_key = (origin, destination, use_live_traffic)
+        
         try:
-            # Call Google Maps Directions API
-            directions_result = self.gmaps_client.directions(
-                origin=(origin_lat, origin_lng),
-                destination=(dest_lat, dest_lng),
-                mode="driving",
-                departure_time="now",  # Get real-time traffic data
-                traffic_model="best_guess"
-            )
-            
-            if not directions_result:
-                return None
+            directions_result = directions_cache.get(cache_key)
+            if directions_result is None:
+                if use_live_traffic:
+                    # Get real-time traffic data
+                    traffic_options = {
+                        "departure_time": "now",
+                        "traffic_model": "best_guess"
+                    }
+                else:
+                    traffic_options = {}
+                
+                # Call Google Maps Directions API
+                directions_result = await asyncio.to_thread(
+                    self.gmaps_client.directions,
+                    origin=origin,
+                    destination=destination,
+                    mode="driving",
+                    alternatives=False,
+                    **traffic_options
+                )
+                
+                if not directions_result:
+                    return None
+                directions_cache.set(cache_key, directions_result)
             
             # Extract first route (best route)
             route = directions_result[0]
@@ -692,7 +1097,8 @@ class LocationService:
     ) -> Dict[str, Any]:
         """
         Detect if current location deviates significantly from expected route.
-        Calculates the minimum distance from current location to any point on the route.
+        Calculates the minimum distance from current location to the route,
+        treating consecutive waypoints as straight segments.
         
         Args:
             current_lat: Current latitude
@@ -724,10 +1130,25 @@ class LocationService:
                 "threshold_meters": threshold_meters
             }
         
-        # Find minimum distance to any waypoint on the route
-        min_distance_km = float('inf')
+        # Find the waypoint closest to the current location. The haversine
+        # term `a` grows monotonically with distance, so waypoints are
+        # compared on `a` alone and only the closest one is converted to km;
+        # the current location's terms are computed once outside the loop
+        current_lat_rad = math.radians(current_lat)
+        current_lng_rad = math.radians(current_lng)
+        cos_current_lat = math.cos(current_lat_rad)
+        
+        min_a = float('inf')
         closest_waypoint = None
         
+        # The route is a polyline, so the location may lie closer to a
+        # segment between two waypoints than to either waypoint. Segments
+        # are measured on a flat plane centred on the current location,
+        # which is accurate at city scale; (prev_x, prev_y) is the previous
+        # waypoint in km on that plane
+        min_segment_km_sq = float('inf')
+        prev_x = prev_y = None
+        
         for waypoint in route_waypoints:
             waypoint_lat = waypoint.get("latitude")
             waypoint_lng = waypoint.get("longitude")
@@ -735,14 +1156,41 @@ class LocationService:
             if waypoint_lat is None or waypoint_lng is None:
                 continue
             
-            distance_km = self.calculate_distance(
-                current_lat, current_lng,
-                waypoint_lat, waypoint_lng
-            )
+            waypoint_lat_rad = math.radians(waypoint_lat)
+            dlat = waypoint_lat_rad - current_lat_rad
+            dlon = math.radians(waypoint_lng) - current_lng_rad
+            a = math.sin(dlat / 2)**2 + cos_current_lat * math.cos(waypoint_lat_rad) * math.sin(dlon / 2)**2
             
-            if distance_km < min_distance_km:
-                min_distance_km = distance_km
+            if a < min_a:
+                min_a = a
                 closest_waypoint = waypoint
+            
+            x = EARTH_RADIUS_KM * cos_current_lat * dlon
+            y = EARTH_RADIUS_KM * dlat
+            
+            if prev_x is not None:
+                # Closest point to the origin inside the segment; its ends
+                # are already covered by the waypoint distances
+                seg_x = x - prev_x
+                seg_y = y - prev_y
+                seg_len_sq = seg_x * seg_x + seg_y * seg_y
+                if seg_len_sq > 0:
+                    t = -(prev_x * seg_x + prev_y * seg_y) / seg_len_sq
+                    if 0 < t < 1:
+                        px = prev_x + t * seg_x
+                        py = prev_y + t * seg_y
+                        min_segment_km_sq = min(min_segment_km_sq, px * px + py * py)
+            
+            prev_x = x
+            prev_y = y
+        
+        if closest_waypoint is None:
+            min_distance_km = float('inf')
+        else:
+            min_distance_km = min(
+                EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(min(min_a, 1.0))),
+                math.sqrt(min_segment_km_sq)
+            )
         
         # Convert to meters
         deviation_distance_meters = min_distance_km * 1000.0
@@ -5,11 +5,12 @@ Handles driver availability, ride broadcasting, and matching logic.
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import json
+import math
 from redis import Redis
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.models.user import User, DriverProfile
 from app.models.location import Location
-from app.services.location_service import calculate_distance
+from app.services.location_service import EARTH_RADIUS_KM, calculate_distance
 
 
 class MatchingService:
@@ -21,6 +22,8 @@ class MatchingService:
         self.DRIVER_AVAILABILITY_PREFIX = "driver:availability:"
         self.DRIVER_LOCATION_PREFIX = "driver:location:"
         self.AVAILABLE_DRIVERS_SET = "drivers:available"
+        # Geo index of available drivers' locations
+        self.AVAILABLE_DRIVERS_GEO = "drivers:geo"
         
         # Extended area support (Requirements: 18.5, 18.6)
         self.CITY_CENTER_LAT = 22.7196
@@ -32,6 +35,10 @@ class MatchingService:
             "min_longitude": 75.7,
             "max_longitude": 75.9
         }
+        # City center terms of the Haversine formula, computed once
+        self._center_lat_rad = math.radians(self.CITY_CENTER_LAT)
+        self._center_lon_rad = math.radians(self.CITY_CENTER_LON)
+        self._cos_center_lat = math.cos(self._center_lat_rad)
     
     def is_in_extended_area(self, latitude: float, longitude: float) -> bool:
         """
@@ -46,23 +53,26 @@ class MatchingService:
             
         Requirements: 18.2, 18.3
         """
-        # Check if within service area
-        distance_from_center = calculate_distance(
-            self.CITY_CENTER_LAT,
-            self.CITY_CENTER_LON,
-            latitude,
-            longitude
-        )
-        in_service_area = distance_from_center <= self.SERVICE_AREA_RADIUS_KM
-        
-        # Check if within city limits
+        # Extended area = in service area but not in city limits, so the
+        # cheap city limits check comes first
         in_city_limits = (
             self.CITY_LIMITS["min_latitude"] <= latitude <= self.CITY_LIMITS["max_latitude"] and
             self.CITY_LIMITS["min_longitude"] <= longitude <= self.CITY_LIMITS["max_longitude"]
         )
-        
-        # Extended area = in service area but not in city limits
-        return in_service_area and not in_city_limits
+        if in_city_limits:
+            return False
+        
+        # Check if within service area; same arithmetic as calculate_distance
+        # from the city center, with the center's terms precomputed
+        lat_rad = math.radians(latitude)
+        dlat = lat_rad - self._center_lat_rad
+        dlon = math.radians(longitude) - self._center_lon_rad
+        a = math.sin(dlat * 0.5)**2 + self._cos_center_lat * math.cos(lat_rad) * math.sin(dlon * 0.5)**2
+        if a > 1.0:
+            a = 1.0
+        distance_from_center = EARTH_RADIUS_KM * (2 * math.asin(math.sqrt(a)))
+        
+        return distance_from_center <= self.SERVICE_AREA_RADIUS_KM
     
     def get_initial_search_radius(self, latitude: float, longitude: float) -> float:
         """
@@ -139,40 +149,50 @@ class MatchingService:
         if not driver:
             raise ValueError("Driver not found")
         
+        # One clock read for every timestamp written below
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        
+        # Apply all Redis writes atomically in one round trip
+        pipe = self.redis.pipeline(transaction=True)
+        
         # Store availability status
         availability_key = f"{self.DRIVER_AVAILABILITY_PREFIX}{driver_id}"
         availability_data = {
             "status": "available",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now_iso,
             "latitude": latitude,
             "longitude": longitude
         }
-        self.redis.setex(
+        pipe.setex(
             availability_key,
             timedelta(hours=24),  # Expire after 24 hours
             json.dumps(availability_data)
         )
         
-        # Add to available drivers set
-        self.redis.sadd(self.AVAILABLE_DRIVERS_SET, driver_id)
+        # Add to available drivers set and geo index
+        pipe.sadd(self.AVAILABLE_DRIVERS_SET, driver_id)
+        pipe.geoadd(self.AVAILABLE_DRIVERS_GEO, (longitude, latitude, driver_id))
         
         # Store location separately for quick access
         location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
         location_data = {
             "latitude": latitude,
             "longitude": longitude,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now_iso
         }
-        self.redis.setex(
+        pipe.setex(
             location_key,
             timedelta(hours=24),
             json.dumps(location_data)
         )
         
+        pipe.execute()
+        
         # Track availability start time for daily hours calculation
         if driver.driver_profile:
             driver.driver_profile.status = "available"
-            driver.driver_profile.availability_start_time = datetime.utcnow()
+            driver.driver_profile.availability_start_time = now
             self.db.commit()
         
         return {
@@ -204,30 +224,34 @@ class MatchingService:
         if not driver:
             raise ValueError("Driver not found")
         
+        now = datetime.utcnow()
+        
         # Calculate availability hours if driver was available
         hours_accumulated = 0.0
         if driver.driver_profile and driver.driver_profile.availability_start_time:
-            time_diff = datetime.utcnow() - driver.driver_profile.availability_start_time
+            time_diff = now - driver.driver_profile.availability_start_time
             hours_accumulated = time_diff.total_seconds() / 3600
             
             # Accumulate to daily total
             driver.driver_profile.daily_availability_hours += hours_accumulated
             driver.driver_profile.availability_start_time = None
         
-        # Update availability status
+        # Update availability status and remove from available drivers set
+        # and geo index, atomically in one round trip
         availability_key = f"{self.DRIVER_AVAILABILITY_PREFIX}{driver_id}"
         availability_data = {
             "status": "unavailable",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now.isoformat()
         }
-        self.redis.setex(
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.setex(
             availability_key,
             timedelta(hours=24),
             json.dumps(availability_data)
         )
-        
-        # Remove from available drivers set
-        self.redis.srem(self.AVAILABLE_DRIVERS_SET, driver_id)
+        pipe.srem(self.AVAILABLE_DRIVERS_SET, driver_id)
+        pipe.zrem(self.AVAILABLE_DRIVERS_GEO, driver_id)
+        pipe.execute()
         
         # Update driver profile status in database
         if driver.driver_profile:
@@ -254,43 +278,76 @@ class MatchingService:
         """
         # Get driver from database
         driver = self.db.query(User).filter(User.user_id == driver_id).first()
+        now = datetime.utcnow()
+        
+        hours_accumulated = self._mark_driver_busy(driver, now)
+        self._publish_driver_busy(driver_id, now)
         
+        # Update driver profile status in database
+        if driver and driver.driver_profile:
+            self.db.commit()
+        
+        return {
+            "status": "success",
+            "message": f"Driver {driver_id} is now busy",
+            "hours_accumulated": round(hours_accumulated, 2),
+            "total_daily_hours": round(driver.driver_profile.daily_availability_hours, 2) if driver and driver.driver_profile else 0.0
+        }
+    
+    def _mark_driver_busy(self, driver: Optional[User], now: datetime) -> float:
+        """
+        Mark an already loaded driver as busy on the session without committing.
+        
+        Accumulates availability hours and sets the profile status. The
+        caller commits, and writes the Redis status with _publish_driver_busy.
+        
+        Args:
+            driver: Driver's User row, or None if not found
+            now: Time of the status change
+            
+        Returns:
+            Availability hours accumulated by this change
+        """
         # Calculate availability hours if driver was available
         hours_accumulated = 0.0
         if driver and driver.driver_profile and driver.driver_profile.availability_start_time:
-            time_diff = datetime.utcnow() - driver.driver_profile.availability_start_time
+            time_diff = now - driver.driver_profile.availability_start_time
             hours_accumulated = time_diff.total_seconds() / 3600
             
             # Accumulate to daily total
             driver.driver_profile.daily_availability_hours += hours_accumulated
             driver.driver_profile.availability_start_time = None
         
-        # Update availability status
+        if driver and driver.driver_profile:
+            driver.driver_profile.status = "busy"
+        
+        return hours_accumulated
+    
+    def _publish_driver_busy(self, driver_id: str, now: datetime) -> None:
+        """
+        Write a driver's busy status to Redis.
+        
+        Sets the availability status and removes the driver from the
+        available drivers set and geo index, atomically in one round trip.
+        
+        Args:
+            driver_id: Driver's user ID
+            now: Time of the status change
+        """
         availability_key = f"{self.DRIVER_AVAILABILITY_PREFIX}{driver_id}"
         availability_data = {
             "status": "busy",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now.isoformat()
         }
-        self.redis.setex(
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.setex(
             availability_key,
             timedelta(hours=24),
             json.dumps(availability_data)
         )
-        
-        # Remove from available drivers set
-        self.redis.srem(self.AVAILABLE_DRIVERS_SET, driver_id)
-        
-        # Update driver profile status in database
-        if driver and driver.driver_profile:
-            driver.driver_profile.status = "busy"
-            self.db.commit()
-        
-        return {
-            "status": "success",
-            "message": f"Driver {driver_id} is now busy",
-            "hours_accumulated": round(hours_accumulated, 2),
-            "total_daily_hours": round(driver.driver_profile.daily_availability_hours, 2) if driver and driver.driver_profile else 0.0
-        }
+        pipe.srem(self.AVAILABLE_DRIVERS_SET, driver_id)
+        pipe.zrem(self.AVAILABLE_DRIVERS_GEO, driver_id)
+        pipe.execute()
     
     def get_driver_status(self, driver_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -303,12 +360,24 @@ class MatchingService:
             Dict with status information or None if not found
         """
         availability_key = f"{self.DRIVER_AVAILABILITY_PREFIX}{driver_id}"
-        data = self.redis.get(availability_key)
+        location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
+        data, location_data = self.redis.mget(availability_key, location_key)
         
-        if data:
-            return json.loads(data)
+        if not data:
+            return None
         
-        return None
+        status = json.loads(data)
+        
+        # Location updates are only written to the location key; one made
+        # since the status was set is reported with the status
+        if location_data:
+            location = json.loads(location_data)
+            if location["timestamp"] >= status["timestamp"]:
+                status["latitude"] = location["latitude"]
+                status["longitude"] = location["longitude"]
+                status["timestamp"] = location["timestamp"]
+        
+        return status
     
     def is_driver_available(self, driver_id: str) -> bool:
         """
@@ -339,56 +408,99 @@ class MatchingService:
         Returns:
             List of available drivers with their locations and distances
         """
-        # Get all available driver IDs
-        available_driver_ids = self.redis.smembers(self.AVAILABLE_DRIVERS_SET)
-        
-        drivers_in_radius = []
+        # Get available drivers near the pickup from the geo index. Redis
+        # measures with a slightly larger Earth radius than
+        # calculate_distance, so the search is widened a little and exact
+        # distances are checked below
+        nearby_driver_ids = self.redis.geosearch(
+            self.AVAILABLE_DRIVERS_GEO,
+            longitude=pickup_longitude,
+            latitude=pickup_latitude,
+            radius=radius_km * 1.001,
+            unit="km"
+        )
         
-        for driver_id in available_driver_ids:
-            # Get driver location
-            location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
-            location_data = self.redis.get(location_key)
-            
+        if not nearby_driver_ids:
+            return []
+        
+        # Fetch their locations in one round trip; drivers whose location
+        # has expired are skipped
+        pipe = self.redis.pipeline(transaction=False)
+        for driver_id in nearby_driver_ids:
+            pipe.get(f"{self.DRIVER_LOCATION_PREFIX}{driver_id}")
+        location_values = pipe.execute()
+        
+        # Haversine terms of the pickup point, shared by every driver, and
+        # the haversine term `a` of a point just beyond the radius; drivers
+        # with a larger `a` are out of range without finishing the distance
+        pickup_lat_rad = math.radians(pickup_latitude)
+        pickup_lon_rad = math.radians(pickup_longitude)
+        cos_pickup_lat = math.cos(pickup_lat_rad)
+        max_a = math.sin(min(radius_km * 1.000001 / EARTH_RADIUS_KM, math.pi) * 0.5)**2
+        
+        # Keep drivers within radius as (driver_id, location, distance)
+        candidates = []
+        for driver_id, location_data in zip(nearby_driver_ids, location_values):
             if not location_data:
                 continue
             
             location = json.loads(location_data)
             
-            # Calculate distance
-            distance = calculate_distance(
-                pickup_latitude,
-                pickup_longitude,
-                location["latitude"],
-                location["longitude"]
-            )
+            # Same arithmetic as calculate_distance with the pickup terms hoisted
+            driver_lat_rad = math.radians(location["latitude"])
+            dlat = driver_lat_rad - pickup_lat_rad
+            dlon = math.radians(location["longitude"]) - pickup_lon_rad
+            a = math.sin(dlat * 0.5)**2 + cos_pickup_lat * math.cos(driver_lat_rad) * math.sin(dlon * 0.5)**2
+            
+            if a > max_a:
+                continue
+            if a > 1.0:
+                a = 1.0
+            
+            distance = EARTH_RADIUS_KM * (2 * math.asin(math.sqrt(a)))
             
             # Check if within radius
             if distance <= radius_km:
-                # Get driver details from database
-                driver = self.db.query(User).filter(
-                    User.user_id == driver_id
-                ).first()
-                
-                if driver and driver.driver_profile:
-                    drivers_in_radius.append({
-                        "driver_id": driver_id,
-                        "name": driver.name,
-                        "phone_number": driver.phone_number,
-                        "latitude": location["latitude"],
-                        "longitude": location["longitude"],
-                        "distance_km": round(distance, 2),
-                        "vehicle": {
-                            "registration_number": driver.driver_profile.vehicle_registration,
-                            "make": driver.driver_profile.vehicle_make,
-                            "model": driver.driver_profile.vehicle_model,
-                            "color": driver.driver_profile.vehicle_color
-                        },
-                        "rating": driver.average_rating,
-                        "total_rides": driver.total_rides,
-                        # Include driver preferences (Requirements: 18.10, 18.11)
-                        "accept_extended_area": driver.driver_profile.accept_extended_area,
-                        "accept_parcel_delivery": driver.driver_profile.accept_parcel_delivery
-                    })
+                candidates.append((driver_id, location, distance))
+        
+        if not candidates:
+            return []
+        
+        # Get details of all candidate drivers from database in one query
+        drivers = {
+            driver.user_id: driver
+            for driver in self.db.query(User).options(
+                joinedload(User.driver_profile)
+            ).filter(
+                User.user_id.in_([driver_id for driver_id, _, _ in candidates])
+            ).all()
+        }
+        
+        drivers_in_radius = []
+        
+        for driver_id, location, distance in candidates:
+            driver = drivers.get(driver_id)
+            
+            if driver and driver.driver_profile:
+                drivers_in_radius.append({
+                    "driver_id": driver_id,
+                    "name": driver.name,
+                    "phone_number": driver.phone_number,
+                    "latitude": location["latitude"],
+                    "longitude": location["longitude"],
+                    "distance_km": round(distance, 2),
+                    "vehicle": {
+                        "registration_number": driver.driver_profile.vehicle_registration,
+                        "make": driver.driver_profile.vehicle_make,
+                        "model": driver.driver_profile.vehicle_model,
+                        "color": driver.driver_profile.vehicle_color
+                    },
+                    "rating": driver.average_rating,
+                    "total_rides": driver.total_rides,
+                    # Include driver preferences (Requirements: 18.10, 18.11)
+                    "accept_extended_area": driver.driver_profile.accept_extended_area,
+                    "accept_parcel_delivery": driver.driver_profile.accept_parcel_delivery
+                })
         
         # Sort by distance (closest first)
         drivers_in_radius.sort(key=lambda x: x["distance_km"])
@@ -418,26 +530,22 @@ class MatchingService:
             "longitude": longitude,
             "timestamp": datetime.utcnow().isoformat()
         }
-        self.redis.setex(
+        
+        # Store the location and check availability in one round trip; the
+        # availability data is not rewritten, get_driver_status reads the
+        # location from here
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.setex(
             location_key,
             timedelta(hours=24),
             json.dumps(location_data)
         )
+        pipe.sismember(self.AVAILABLE_DRIVERS_SET, driver_id)
+        _, is_available = pipe.execute()
         
-        # Also update in availability data if driver is available
-        availability_key = f"{self.DRIVER_AVAILABILITY_PREFIX}{driver_id}"
-        availability_data = self.redis.get(availability_key)
-        
-        if availability_data:
-            data = json.loads(availability_data)
-            data["latitude"] = latitude
-            data["longitude"] = longitude
-            data["timestamp"] = datetime.utcnow().isoformat()
-            self.redis.setex(
-                availability_key,
-                timedelta(hours=24),
-                json.dumps(data)
-            )
+        # Move the driver in the geo index if they are available
+        if is_available:
+            self.redis.geoadd(self.AVAILABLE_DRIVERS_GEO, (longitude, latitude, driver_id))
         
         return {
             "status": "success",
@@ -500,6 +608,9 @@ class MatchingService:
                 if driver.get("accept_extended_area", True)  # Default to True if not set
             ]
         
+        # One clock read for the broadcast and all of its notifications
+        now_iso = datetime.utcnow().isoformat()
+        
         # Store broadcast details in Redis
         broadcast_key = f"ride:broadcast:{ride_id}"
         broadcast_data = {
@@ -511,21 +622,26 @@ class MatchingService:
             "estimated_fare": estimated_fare,
             "radius_km": radius_km,
             "is_extended_area": is_extended_area,
-            "broadcast_time": datetime.utcnow().isoformat(),
+            "broadcast_time": now_iso,
             "notified_drivers": [d["driver_id"] for d in available_drivers],
             "status": "active"
         }
         
+        # Write the broadcast and every driver notification in one round trip
+        pipe = self.redis.pipeline(transaction=False)
+        
         # Store broadcast with 10 minute expiry
-        self.redis.setex(
+        pipe.setex(
             broadcast_key,
             timedelta(minutes=10),
             json.dumps(broadcast_data)
         )
         
-        # Store driver notification list for this ride
+        # Store driver notification list for this ride. The hash lives under
+        # its own key name because driver:notifications:{id} held a sorted
+        # set, and writing a hash to that key would fail with WRONGTYPE
         for driver in available_drivers:
-            driver_notification_key = f"driver:notifications:{driver['driver_id']}"
+            driver_notification_key = f"driver:ride_notifications:{driver['driver_id']}"
             notification_data = {
                 "ride_id": ride_id,
                 "pickup_latitude": pickup_latitude,
@@ -535,17 +651,17 @@ class MatchingService:
                 "estimated_fare": estimated_fare,
                 "distance_to_pickup_km": driver["distance_km"],
                 "is_extended_area": is_extended_area,
-                "notified_at": datetime.utcnow().isoformat()
+                "notified_at": now_iso
             }
             
-            # Add to driver's notification list (as a sorted set with timestamp as score)
-            self.redis.zadd(
-                driver_notification_key,
-                {json.dumps(notification_data): datetime.utcnow().timestamp()}
-            )
+            # Add to driver's notifications, keyed by ride so that it can be
+            # removed without scanning the others
+            pipe.hset(driver_notification_key, ride_id, json.dumps(notification_data))
             
             # Set expiry on notification list
-            self.redis.expire(driver_notification_key, timedelta(minutes=10))
+            pipe.expire(driver_notification_key, timedelta(minutes=10))
+        
+        pipe.execute()
         
         # Send WebSocket notifications (non-blocking)
         websocket_sent_count = self._send_websocket_notifications(
@@ -613,32 +729,39 @@ class MatchingService:
         from app.services.websocket_service import connection_manager
         
         async def send_notifications():
-            sent_count = 0
-            for driver in drivers:
-                websocket_message = {
+            # Parts of the message shared by every driver
+            pickup = {
+                "latitude": pickup_latitude,
+                "longitude": pickup_longitude
+            }
+            destination = {
+                "latitude": destination_latitude,
+                "longitude": destination_longitude
+            }
+            timestamp = datetime.utcnow().isoformat()
+            
+            def build_message(driver):
+                return {
                     "type": "ride_request",
                     "data": {
                         "ride_id": ride_id,
-                        "pickup": {
-                            "latitude": pickup_latitude,
-                            "longitude": pickup_longitude
-                        },
-                        "destination": {
-                            "latitude": destination_latitude,
-                            "longitude": destination_longitude
-                        },
+                        "pickup": pickup,
+                        "destination": destination,
                         "estimated_fare": estimated_fare,
                         "distance_to_pickup_km": driver["distance_km"],
                         "is_extended_area": is_extended_area,
                         "broadcast_time": broadcast_time
                     },
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": timestamp
                 }
-                
-                # Send to driver if connected
-                if await connection_manager.send_personal_message(websocket_message, driver["driver_id"]):
-                    sent_count += 1
-            return sent_count
+            
+            # Send to all connected drivers concurrently; a failed send
+            # counts as not sent without stopping the others
+            results = await asyncio.gather(*[
+                connection_manager.send_personal_message(build_message(driver), driver["driver_id"])
+                for driver in drivers
+            ], return_exceptions=True)
+            return sum(1 for result in results if result is True)
         
         # Run async function in event loop
         try:
@@ -705,18 +828,14 @@ class MatchingService:
             json.dumps(broadcast)
         )
         
-        # Remove notifications from driver queues
-        for driver_id in broadcast.get("notified_drivers", []):
-            driver_notification_key = f"driver:notifications:{driver_id}"
-            
-            # Get all notifications for this driver
-            notifications = self.redis.zrange(driver_notification_key, 0, -1)
-            
-            # Remove notifications for this ride
-            for notification_json in notifications:
-                notification = json.loads(notification_json)
-                if notification.get("ride_id") == ride_id:
-                    self.redis.zrem(driver_notification_key, notification_json)
+        # Remove this ride's notification from every driver's queue in one
+        # round trip
+        notified_drivers = broadcast.get("notified_drivers", [])
+        if notified_drivers:
+            pipe = self.redis.pipeline(transaction=False)
+            for driver_id in notified_drivers:
+                pipe.hdel(f"driver:ride_notifications:{driver_id}", ride_id)
+            pipe.execute()
         
         return {
             "status": "success",
@@ -750,14 +869,20 @@ class MatchingService:
         # Create a lock key for this ride to handle concurrent acceptances
         lock_key = f"ride:lock:{ride_id}"
         lock_timeout = 10  # seconds
+        driver_location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
         
-        # Try to acquire lock
-        lock_acquired = self.redis.set(
+        # Try to acquire lock, and read the driver's availability and
+        # location, atomically in one round trip
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(
             lock_key,
             driver_id,
             nx=True,  # Only set if doesn't exist
             ex=lock_timeout
         )
+        pipe.sismember(self.AVAILABLE_DRIVERS_SET, driver_id)
+        pipe.get(driver_location_key)
+        lock_acquired, driver_available, driver_location_data = pipe.execute()
         
         if not lock_acquired:
             # Another driver is already processing this ride
@@ -782,7 +907,7 @@ class MatchingService:
             # Lock acquired, proceed with matching
             
             # Verify driver is available
-            if not self.is_driver_available(driver_id):
+            if not driver_available:
                 return {
                     "status": "error",
                     "message": f"Driver {driver_id} is not available"
@@ -811,10 +936,7 @@ class MatchingService:
                     "message": "Rider ID mismatch"
                 }
             
-            # Get driver location
-            driver_location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
-            driver_location_data = self.redis.get(driver_location_key)
-            
+            # Check driver location
             if not driver_location_data:
                 return {
                     "status": "error",
@@ -838,30 +960,24 @@ class MatchingService:
             # Calculate estimated arrival time (assuming 30 km/h average speed)
             estimated_arrival_minutes = int((distance_to_pickup / 30) * 60)
             
+            # Get driver details with their profile in one query; the row
+            # is reused for the busy status change and the response
+            driver = self.db.query(User).options(
+                joinedload(User.driver_profile)
+            ).filter(User.user_id == driver_id).first()
+            
             # Update ride with match information
+            matched_at = datetime.utcnow()
             ride.driver_id = driver_id
             ride.status = RideStatus.MATCHED
-            ride.matched_at = datetime.utcnow()
-            
-            # Commit the match
-            self.db.commit()
-            
-            # Update driver status to busy
-            self.set_driver_busy(driver_id)
-            
-            # Cancel the broadcast for this ride
-            self.cancel_broadcast(ride_id)
-            
-            # Get driver details
-            from app.models.user import User
-            driver = self.db.query(User).filter(User.user_id == driver_id).first()
+            ride.matched_at = matched_at
             
             match_result = {
                 "status": "success",
                 "ride_id": ride_id,
                 "driver_id": driver_id,
                 "rider_id": rider_id,
-                "matched_at": ride.matched_at.isoformat(),
+                "matched_at": matched_at.isoformat(),
                 "distance_to_pickup_km": round(distance_to_pickup, 2),
                 "estimated_arrival_minutes": estimated_arrival_minutes,
                 "driver_details": {
@@ -881,6 +997,18 @@ class MatchingService:
                     "color": driver.driver_profile.vehicle_color
                 }
             
+            # Update driver status to busy and commit it with the match; the
+            # response is built first since commit expires loaded rows
+            self._mark_driver_busy(driver, matched_at)
+            self.db.commit()
+            
+            # Take the driver out of the available pool only once the match
+            # is committed, so a failed commit leaves Redis untouched
+            self._publish_driver_busy(driver_id, matched_at)
+            
+            # Cancel the broadcast for this ride
+            self.cancel_broadcast(ride_id)
+            
             return match_result
             
         finally:
@@ -960,16 +1088,21 @@ class MatchingService:
         # Update broadcast details with new radius and newly notified drivers
         broadcast_details["radius_km"] = new_radius_km
         broadcast_details["broadcast_count"] = broadcast_details.get("broadcast_count", 1) + 1
-        broadcast_details["last_expansion_at"] = datetime.utcnow().isoformat()
+        now_iso = datetime.utcnow().isoformat()
+        broadcast_details["last_expansion_at"] = now_iso
         
         # Add newly notified drivers to the list
         for driver in newly_included_drivers:
             if driver["driver_id"] not in broadcast_details["notified_drivers"]:
                 broadcast_details["notified_drivers"].append(driver["driver_id"])
         
+        # Write the broadcast and every new driver notification in one
+        # round trip
+        pipe = self.redis.pipeline(transaction=False)
+        
         # Store updated broadcast details
         broadcast_key = f"ride:broadcast:{ride_id}"
-        self.redis.setex(
+        pipe.setex(
             broadcast_key,
             timedelta(minutes=10),
             json.dumps(broadcast_details)
@@ -980,7 +1113,7 @@ class MatchingService:
         dest_lon = ride.destination["longitude"]
         
         for driver in newly_included_drivers:
-            driver_notification_key = f"driver:notifications:{driver['driver_id']}"
+            driver_notification_key = f"driver:ride_notifications:{driver['driver_id']}"
             notification_data = {
                 "ride_id": ride_id,
                 "pickup_latitude": pickup_lat,
@@ -989,18 +1122,17 @@ class MatchingService:
                 "destination_longitude": dest_lon,
                 "estimated_fare": ride.estimated_fare,
                 "distance_to_pickup_km": driver["distance_km"],
-                "notified_at": datetime.utcnow().isoformat(),
+                "notified_at": now_iso,
                 "broadcast_round": broadcast_details["broadcast_count"]
             }
             
-            # Add to driver's notification list
-            self.redis.zadd(
-                driver_notification_key,
-                {json.dumps(notification_data): datetime.utcnow().timestamp()}
-            )
+            # Add to driver's notifications, keyed by ride
+            pipe.hset(driver_notification_key, ride_id, json.dumps(notification_data))
             
             # Set expiry on notification list
-            self.redis.expire(driver_notification_key, timedelta(minutes=10))
+            pipe.expire(driver_notification_key, timedelta(minutes=10))
+        
+        pipe.execute()
         
         return {
             "status": "success",
@@ -1068,30 +1200,24 @@ class MatchingService:
             }
         
         # Log the rejection in Redis
+        now = datetime.utcnow()
         rejection_key = f"ride:rejections:{ride_id}"
         rejection_data = {
             "driver_id": driver_id,
-            "rejected_at": datetime.utcnow().isoformat()
+            "rejected_at": now.isoformat()
         }
         
         # Add to rejection list (as a sorted set with timestamp as score)
         self.redis.zadd(
             rejection_key,
-            {json.dumps(rejection_data): datetime.utcnow().timestamp()}
+            {json.dumps(rejection_data): now.timestamp()}
         )
         
         # Set expiry on rejection list (same as broadcast)
         self.redis.expire(rejection_key, timedelta(minutes=10))
         
         # Remove the notification from driver's queue
-        driver_notification_key = f"driver:notifications:{driver_id}"
-        notifications = self.redis.zrange(driver_notification_key, 0, -1)
-        
-        for notification_json in notifications:
-            notification = json.loads(notification_json)
-            if notification.get("ride_id") == ride_id:
-                self.redis.zrem(driver_notification_key, notification_json)
-                break
+        self.redis.hdel(f"driver:ride_notifications:{driver_id}", ride_id)
         
         # Get count of rejections for this ride
         rejection_count = self.redis.zcard(rejection_key)
@@ -1341,6 +1467,11 @@ class MatchingService:
                 if driver.get("accept_extended_area", True)
             ]
         
+        # One clock read for the broadcast and all of its notifications
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        now_ts = now.timestamp()
+        
         # Store broadcast details in Redis
         broadcast_key = f"parcel:broadcast:{delivery_id}"
         broadcast_data = {
@@ -1356,13 +1487,16 @@ class MatchingService:
             "special_instructions": special_instructions,
             "radius_km": radius_km,
             "is_extended_area": is_extended_area,
-            "broadcast_time": datetime.utcnow().isoformat(),
+            "broadcast_time": now_iso,
             "notified_drivers": [d["driver_id"] for d in available_drivers],
             "status": "active"
         }
         
+        # Write the broadcast and every driver notification in one round trip
+        pipe = self.redis.pipeline(transaction=False)
+        
         # Store broadcast with 10 minute expiry
-        self.redis.setex(
+        pipe.setex(
             broadcast_key,
             timedelta(minutes=10),
             json.dumps(broadcast_data)
@@ -1384,17 +1518,19 @@ class MatchingService:
                 "special_instructions": special_instructions,
                 "distance_to_pickup_km": driver["distance_km"],
                 "is_extended_area": is_extended_area,
-                "notified_at": datetime.utcnow().isoformat()
+                "notified_at": now_iso
             }
             
             # Add to driver's notification list (as a sorted set with timestamp as score)
-            self.redis.zadd(
+            pipe.zadd(
                 driver_notification_key,
-                {json.dumps(notification_data): datetime.utcnow().timestamp()}
+                {json.dumps(notification_data): now_ts}
             )
             
             # Set expiry on notification list
-            self.redis.expire(driver_notification_key, timedelta(minutes=10))
+            pipe.expire(driver_notification_key, timedelta(minutes=10))
+        
+        pipe.execute()
         
         # Send WebSocket notifications (non-blocking)
         websocket_sent_count = self._send_parcel_websocket_notifications(
@@ -1471,20 +1607,24 @@ class MatchingService:
         from app.services.websocket_service import connection_manager
         
         async def send_notifications():
-            sent_count = 0
-            for driver in drivers:
-                websocket_message = {
+            # Parts of the message shared by every driver
+            pickup = {
+                "latitude": pickup_latitude,
+                "longitude": pickup_longitude
+            }
+            delivery = {
+                "latitude": delivery_latitude,
+                "longitude": delivery_longitude
+            }
+            timestamp = datetime.utcnow().isoformat()
+            
+            def build_message(driver):
+                return {
                     "type": "parcel_request",
                     "data": {
                         "delivery_id": delivery_id,
-                        "pickup": {
-                            "latitude": pickup_latitude,
-                            "longitude": pickup_longitude
-                        },
-                        "delivery": {
-                            "latitude": delivery_latitude,
-                            "longitude": delivery_longitude
-                        },
+                        "pickup": pickup,
+                        "delivery": delivery,
                         "estimated_fare": estimated_fare,
                         "parcel_size": parcel_size,
                         "is_fragile": is_fragile,
@@ -1494,13 +1634,16 @@ class MatchingService:
                         "is_extended_area": is_extended_area,
                         "broadcast_time": broadcast_time
                     },
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": timestamp
                 }
-                
-                # Send to driver if connected
-                if await connection_manager.send_personal_message(websocket_message, driver["driver_id"]):
-                    sent_count += 1
-            return sent_count
+            
+            # Send to all connected drivers concurrently; a failed send
+            # counts as not sent without stopping the others
+            results = await asyncio.gather(*[
+                connection_manager.send_personal_message(build_message(driver), driver["driver_id"])
+                for driver in drivers
+            ], return_exceptions=True)
+            return sum(1 for result in results if result is True)
         
         # Run async function in event loop
         try:
@@ -1542,14 +1685,20 @@ class MatchingService:
         # Create a lock key for this delivery to handle concurrent acceptances
         lock_key = f"parcel:lock:{delivery_id}"
         lock_timeout = 10  # seconds
+        driver_location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
         
-        # Try to acquire lock
-        lock_acquired = self.redis.set(
+        # Try to acquire lock, and read the driver's availability and
+        # location, atomically in one round trip
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(
             lock_key,
             driver_id,
             nx=True,  # Only set if doesn't exist
             ex=lock_timeout
         )
+        pipe.sismember(self.AVAILABLE_DRIVERS_SET, driver_id)
+        pipe.get(driver_location_key)
+        lock_acquired, driver_available, driver_location_data = pipe.execute()
         
         if not lock_acquired:
             # Another driver is already processing this delivery
@@ -1576,7 +1725,7 @@ class MatchingService:
             # Lock acquired, proceed with matching
             
             # Verify driver is available
-            if not self.is_driver_available(driver_id):
+            if not driver_available:
                 return {
                     "status": "error",
                     "message": f"Driver {driver_id} is not available"
@@ -1607,10 +1756,7 @@ class MatchingService:
                     "message": "Sender ID mismatch"
                 }
             
-            # Get driver location
-            driver_location_key = f"{self.DRIVER_LOCATION_PREFIX}{driver_id}"
-            driver_location_data = self.redis.get(driver_location_key)
-            
+            # Check driver location
             if not driver_location_data:
                 return {
                     "status": "error",
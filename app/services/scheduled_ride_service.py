@@ -124,7 +124,7 @@ class ScheduledRideService:
                 # Send reminder to rider
                 self.notification_service.send_dual_notification(
                     user_id=ride.rider_id,
-                    message=f"Reminder: Your scheduled ride is in 15 minutes. Pickup at {ride.pickup_location.get('address', 'your location')}.",
+                    message=f"Reminder: Your scheduled ride is in 15 minutes. Pickup at {ride.pickup_location.get('address') or 'your location'}.",
                     notification_type="scheduled_ride_reminder"
                 )
                 
@@ -150,7 +150,7 @@ class ScheduledRideService:
                 # Send reminder to driver
                 self.notification_service.send_dual_notification(
                     user_id=ride.driver_id,
-                    message=f"Reminder: Scheduled pickup in 15 minutes at {ride.pickup_location.get('address', 'pickup location')}.",
+                    message=f"Reminder: Scheduled pickup in 15 minutes at {ride.pickup_location.get('address') or 'pickup location'}.",
                     notification_type="scheduled_ride_driver_reminder"
                 )
                 
@@ -3,14 +3,28 @@ WebSocket Service for real-time communication.
 
 Manages WebSocket connections, authentication, and message broadcasting.
 """
-from typing import Dict, Set, Optional
+from typing import Dict, Iterable, Set, Optional, Union
 from fastapi import WebSocket
 from datetime import datetime
+import asyncio
 import json
 import logging
+import msgpack
+import redis.asyncio as aioredis
 
 logger = logging.getLogger(__name__)
 
+# Subprotocol a client can request to exchange MessagePack binary frames
+# instead of JSON text frames
+MSGPACK_SUBPROTOCOL = "msgpack-v1"
+
+# Redis pub/sub channel prefix used to reach users connected to another worker
+RELAY_CHANNEL_PREFIX = "ws:user:"
+
+# Channel every worker's relay stays subscribed to, so that its listener
+# keeps running while no users are connected
+RELAY_IDLE_CHANNEL = "ws:relay:idle"
+
 
 class ConnectionManager:
     """
@@ -36,12 +50,98 @@ class ConnectionManager:
         
         # Rider connections set for quick filtering
         self.rider_connections: Set[str] = set()
+        
+        # Connections that negotiated MessagePack framing
+        self.msgpack_connections: Set[str] = set()
+        
+        # Cross-worker relay (only used when running several workers)
+        self._relay_redis: Optional[aioredis.Redis] = None
+        self._relay_pubsub = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._relay_unsubscribes: Set[asyncio.Task] = set()
+    
+    async def start_relay(self, redis_url: str) -> None:
+        """
+        Relay messages for users connected to other workers over Redis pub/sub.
+        
+        Each worker subscribes to the channels of the users connected to it;
+        messages for users that are not connected locally are published and
+        delivered by whichever worker holds the connection.
+        
+        Args:
+            redis_url: Redis connection URL
+        """
+        if self._relay_redis is not None:
+            return
+        
+        self._relay_redis = aioredis.from_url(redis_url, decode_responses=True)
+        pubsub = self._relay_redis.pubsub()
+        await pubsub.subscribe(
+            RELAY_IDLE_CHANNEL,
+            *(f"{RELAY_CHANNEL_PREFIX}{user_id}" for user_id in self.active_connections)
+        )
+        self._relay_pubsub = pubsub
+        self._relay_task = asyncio.create_task(self._relay_listener(pubsub))
+        
+        logger.info("WebSocket cross-worker relay started")
+    
+    async def stop_relay(self) -> None:
+        """Stop the cross-worker relay."""
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            try:
+                await self._relay_task
+            except asyncio.CancelledError:
+                pass
+            self._relay_task = None
+        self._relay_pubsub = None
+        
+        if self._relay_redis is not None:
+            await self._relay_redis.aclose()
+            self._relay_redis = None
+    
+    async def _relay_listener(self, pubsub) -> None:
+        """Deliver relayed messages to users connected to this worker."""
+        try:
+            async for item in pubsub.listen():
+                if item["type"] != "message" or item["channel"] == RELAY_IDLE_CHANNEL:
+                    continue
+                
+                user_id = item["channel"][len(RELAY_CHANNEL_PREFIX):]
+                if user_id in self.active_connections:
+                    await self.send_personal_message(json.loads(item["data"]), user_id)
+        finally:
+            await pubsub.aclose()
+    
+    async def _publish(self, message: dict, user_id: str) -> bool:
+        """
+        Publish a message for a user connected to another worker.
+        
+        Only the worker holding the user's connection subscribes to their
+        channel, so the receiver count tells whether the user is connected.
+        
+        Returns:
+            True if a worker connected to the user received the message,
+            False otherwise
+        """
+        try:
+            receivers = await self._relay_redis.publish(
+                f"{RELAY_CHANNEL_PREFIX}{user_id}",
+                json.dumps(message)
+            )
+            if not receivers:
+                logger.warning(f"Cannot send message: user {user_id} not connected")
+            return receivers > 0
+        except Exception as e:
+            logger.error(f"Error relaying message to user {user_id}: {e}")
+            return False
     
     async def connect(
         self,
         websocket: WebSocket,
         user_id: str,
-        user_type: str
+        user_type: str,
+        subprotocol: Optional[str] = None
     ) -> None:
         """
         Accept and register a new WebSocket connection.
@@ -50,8 +150,12 @@ class ConnectionManager:
             websocket: WebSocket connection instance
             user_id: Unique user identifier
             user_type: Type of user ('rider' or 'driver')
+            subprotocol: Negotiated subprotocol, if any
         """
-        await websocket.accept()
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
         
         # If user already has a connection, close the old one
         if user_id in self.active_connections:
@@ -75,6 +179,18 @@ class ConnectionManager:
         elif user_type == "rider":
             self.rider_connections.add(user_id)
         
+        if subprotocol == MSGPACK_SUBPROTOCOL:
+            self.msgpack_connections.add(user_id)
+        else:
+            self.msgpack_connections.discard(user_id)
+        
+        # Receive messages other workers relay for this user
+        if self._relay_pubsub is not None:
+            try:
+                await self._relay_pubsub.subscribe(f"{RELAY_CHANNEL_PREFIX}{user_id}")
+            except Exception as e:
+                logger.error(f"Error subscribing relay channel for user {user_id}: {e}")
+        
         logger.info(f"WebSocket connected: user_id={user_id}, type={user_type}")
     
     def disconnect(self, user_id: str) -> None:
@@ -100,8 +216,27 @@ class ConnectionManager:
         if user_id in self.connection_metadata:
             del self.connection_metadata[user_id]
         
+        self.msgpack_connections.discard(user_id)
+        
+        # Stop receiving relayed messages for this user
+        if self._relay_pubsub is not None:
+            task = asyncio.get_running_loop().create_task(
+                self._unsubscribe_relay(user_id)
+            )
+            self._relay_unsubscribes.add(task)
+            task.add_done_callback(self._relay_unsubscribes.discard)
+        
         logger.info(f"WebSocket disconnected: user_id={user_id}")
     
+    async def _unsubscribe_relay(self, user_id: str) -> None:
+        """Unsubscribe a user's relay channel unless they have reconnected."""
+        if user_id in self.active_connections or self._relay_pubsub is None:
+            return
+        try:
+            await self._relay_pubsub.unsubscribe(f"{RELAY_CHANNEL_PREFIX}{user_id}")
+        except Exception as e:
+            logger.error(f"Error unsubscribing relay channel for user {user_id}: {e}")
+    
     def is_connected(self, user_id: str) -> bool:
         """
         Check if a user is currently connected.
@@ -114,6 +249,37 @@ class ConnectionManager:
         """
         return user_id in self.active_connections
     
+    def uses_msgpack(self, user_id: str) -> bool:
+        """
+        Check if a user's connection exchanges MessagePack frames.
+        
+        Args:
+            user_id: Unique user identifier
+            
+        Returns:
+            True if the connection negotiated MessagePack, False for JSON
+        """
+        return user_id in self.msgpack_connections
+    
+    async def send_message(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        message: dict
+    ) -> None:
+        """
+        Send a message over a socket in the user's negotiated wire format.
+        
+        Args:
+            websocket: WebSocket connection instance
+            user_id: User the socket belongs to
+            message: Message data as dictionary
+        """
+        if user_id in self.msgpack_connections:
+            await websocket.send_bytes(msgpack.packb(message, use_bin_type=True))
+        else:
+            await websocket.send_json(message)
+    
     async def send_personal_message(
         self,
         message: dict,
@@ -122,20 +288,25 @@ class ConnectionManager:
         """
         Send a message to a specific user.
         
+        Users connected to another worker are reached through the relay
+        when it is running.
+        
         Args:
             message: Message data as dictionary
             user_id: Target user identifier
             
         Returns:
-            True if message sent successfully, False otherwise
+            True if message sent (or relayed) successfully, False otherwise
         """
         if user_id not in self.active_connections:
+            if self._relay_redis is not None:
+                return await self._publish(message, user_id)
             logger.warning(f"Cannot send message: user {user_id} not connected")
             return False
         
         try:
             websocket = self.active_connections[user_id]
-            await websocket.send_json(message)
+            await self.send_message(websocket, user_id, message)
             
             # Update last activity
             if user_id in self.connection_metadata:
@@ -149,6 +320,81 @@ class ConnectionManager:
             self.disconnect(user_id)
             return False
     
+    async def send_raw(
+        self,
+        payload: Union[str, bytes],
+        user_id: str
+    ) -> bool:
+        """
+        Send an already-encoded frame to a specific user.
+        
+        Args:
+            payload: JSON text or MessagePack bytes matching the user's wire format
+            user_id: Target user identifier
+            
+        Returns:
+            True if message sent successfully, False otherwise
+        """
+        if user_id not in self.active_connections:
+            logger.warning(f"Cannot send message: user {user_id} not connected")
+            return False
+        
+        try:
+            websocket = self.active_connections[user_id]
+            if isinstance(payload, bytes):
+                await websocket.send_bytes(payload)
+            else:
+                await websocket.send_text(payload)
+            
+            # Update last activity
+            if user_id in self.connection_metadata:
+                self.connection_metadata[user_id]["last_activity"] = datetime.utcnow().isoformat()
+            
+            return True
+        except Exception as e:
+            logger.error(f"Error sending message to user {user_id}: {e}")
+            # Connection might be broken, disconnect it
+            self.disconnect(user_id)
+            return False
+    
+    async def send_to_many(
+        self,
+        message: dict,
+        user_ids: Iterable[str]
+    ) -> int:
+        """
+        Send the same message to several users concurrently.
+        
+        The message is encoded once per wire format rather than once per
+        recipient.
+        
+        Args:
+            message: Message data as dictionary
+            user_ids: Target user identifiers
+            
+        Returns:
+            Number of users who received the message
+        """
+        json_payload = None
+        msgpack_payload = None
+        sends = []
+        
+        for user_id in user_ids:
+            if user_id not in self.active_connections and self._relay_redis is not None:
+                sends.append(self._publish(message, user_id))
+            elif user_id in self.msgpack_connections:
+                if msgpack_payload is None:
+                    msgpack_payload = msgpack.packb(message, use_bin_type=True)
+                sends.append(self.send_raw(msgpack_payload, user_id))
+            else:
+                if json_payload is None:
+                    # Same encoding as WebSocket.send_json
+                    json_payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+                sends.append(self.send_raw(json_payload, user_id))
+        
+        results = await asyncio.gather(*sends)
+        return sum(results)
+    
     async def broadcast_to_drivers(
         self,
         message: dict,
@@ -166,11 +412,8 @@ class ConnectionManager:
             Number of drivers who received the message
         """
         target_drivers = driver_ids if driver_ids else self.driver_connections
-        sent_count = 0
-        
-        for driver_id in target_drivers:
-            if await self.send_personal_message(message, driver_id):
-                sent_count += 1
+        # Copy the set: failed sends disconnect users and mutate it
+        sent_count = await self.send_to_many(message, list(target_drivers))
         
         logger.info(f"Broadcast to {sent_count} drivers: {message.get('type', 'unknown')}")
         return sent_count
@@ -192,11 +435,8 @@ class ConnectionManager:
             Number of riders who received the message
         """
         target_riders = rider_ids if rider_ids else self.rider_connections
-        sent_count = 0
-        
-        for rider_id in target_riders:
-            if await self.send_personal_message(message, rider_id):
-                sent_count += 1
+        # Copy the set: failed sends disconnect users and mutate it
+        sent_count = await self.send_to_many(message, list(target_riders))
         
         logger.info(f"Broadcast to {sent_count} riders: {message.get('type', 'unknown')}")
         return sent_count
@@ -0,0 +1,112 @@
+"""
+Request body parsing utilities.
+
+FastAPI decodes JSON bodies with json.loads and then validates the resulting
+dict. These helpers let a route validate the raw bytes with pydantic-core in
+a single pass instead, while keeping the request schema in the OpenAPI docs.
+
+The request body schemas are added when the OpenAPI document is first
+generated rather than when routes are declared, so models using
+defer_build are not built at import time.
+"""
+from typing import Any, Callable, Coroutine, Dict, Iterable, Type, TypeVar
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def json_body(model: Type[ModelT]) -> Callable[[Request], Coroutine[Any, Any, ModelT]]:
+    """
+    Build a dependency that validates the JSON request body as `model`.
+
+    Validation errors are raised as RequestValidationError with locations
+    prefixed by "body", matching FastAPI's own body validation.
+
+    Args:
+        model: Pydantic model to validate the body against
+
+    Returns:
+        Async dependency returning the validated model instance
+    """
+    async def parse_body(request: Request) -> ModelT:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ])
+
+    # Read by add_json_body_schemas to document the route's request body
+    parse_body.body_model = model
+    return parse_body
+
+
+def _request_body_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Build the OpenAPI request body entry for a route using json_body.
+
+    Nested model definitions are inlined, since "#/$defs" references would
+    not resolve inside the OpenAPI document.
+
+    Args:
+        model: Pydantic model the route validates its body against
+
+    Returns:
+        OpenAPI requestBody object
+    """
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def inline(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref is not None and ref.startswith("#/$defs/"):
+                return inline(defs[ref[len("#/$defs/"):]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(item) for item in node]
+        return node
+
+    return {
+        "content": {"application/json": {"schema": inline(schema)}},
+        "required": True,
+    }
+
+
+def add_json_body_schemas(openapi_schema: Dict[str, Any], routes: Iterable[BaseRoute]) -> None:
+    """
+    Add request body schemas to an OpenAPI document for routes using json_body.
+
+    FastAPI cannot see a body read inside a dependency, so these operations
+    would otherwise be documented without one.
+
+    Args:
+        openapi_schema: Generated OpenAPI document, updated in place
+        routes: Application routes the document was generated from
+    """
+    paths = openapi_schema.get("paths", {})
+    for route in routes:
+        if not isinstance(route, APIRoute) or not route.include_in_schema:
+            continue
+        model = next(
+            (
+                dependency.call.body_model
+                for dependency in route.dependant.dependencies
+                if hasattr(dependency.call, "body_model")
+            ),
+            None
+        )
+        if model is None:
+            continue
+        operations = paths.get(route.path_format, {})
+        for method in route.methods:
+            operation = operations.get(method.lower())
+            if operation is not None:
+                operation["requestBody"] = _request_body_schema(model)
@@ -0,0 +1,20 @@
+"""
+Response classes for API endpoints.
+"""
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core's Rust serializer.
+
+    Drop-in replacement for JSONResponse on endpoints returning large payloads
+    such as ride history; avoids walking the content with the stdlib json
+    encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
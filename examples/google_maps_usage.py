@@ -34,7 +34,7 @@ async def main():
     print(f"Searching for: {search_query}")
     
     try:
-        results = location_service.search_address(search_query, limit=3)
+        results = await location_service.search_address(search_query, limit=3)
         
         if results:
             print(f"\nFound {len(results)} results:")
@@ -63,7 +63,7 @@ async def main():
     print(f"Destination: ({dest_lat}, {dest_lng})")
     
     try:
-        route = location_service.calculate_route(
+        route = await location_service.calculate_route(
             origin_lat, origin_lng,
             dest_lat, dest_lng
         )
@@ -129,7 +129,9 @@ def start_application():
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        log_level="info"
+        log_level="info",
+        workers=settings.web_concurrency,
+        ws_per_message_deflate=settings.ws_per_message_deflate
     )
 
 
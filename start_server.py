@@ -28,7 +28,9 @@ def main():
             host=settings.host,
             port=settings.port,
             reload=settings.debug,
-            log_level="info"
+            log_level="info",
+            workers=settings.web_concurrency,
+            ws_per_message_deflate=settings.ws_per_message_deflate
         )
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down gracefully...")
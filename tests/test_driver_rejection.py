@@ -507,13 +507,13 @@ def test_reject_ride_removes_notification(db_session, redis_client):
     )
     
     # Verify notification exists
-    driver_notification_key = f"driver:notifications:driver1"
-    notifications_before = redis_client.zrange(driver_notification_key, 0, -1)
+    driver_notification_key = f"driver:ride_notifications:driver1"
+    notifications_before = redis_client.hkeys(driver_notification_key)
     assert len(notifications_before) == 1
     
     # Driver rejects the ride
     matching_service.reject_ride("ride123", "driver1")
     
     # Verify notification is removed
-    notifications_after = redis_client.zrange(driver_notification_key, 0, -1)
+    notifications_after = redis_client.hkeys(driver_notification_key)
     assert len(notifications_after) == 0
@@ -9,9 +9,12 @@ import pytest
 from app.services.fare_service import (
     calculate_estimated_fare,
     calculate_final_fare,
+    calculate_estimated_fare_totals,
+    calculate_parcel_fare,
+    calculate_parcel_fare_totals,
     get_fare_summary,
     BASE_FARE,
-    PER_KM_RATE
+    PER_KM_RATE_STANDARD
 )
 
 
@@ -81,7 +84,7 @@ class TestEstimatedFareCalculation:
         
         assert hasattr(fare, 'breakdown')
         assert fare.breakdown.base == BASE_FARE
-        assert fare.breakdown.per_km == PER_KM_RATE
+        assert fare.breakdown.per_km == PER_KM_RATE_STANDARD
         assert fare.breakdown.distance == 5.0
         assert fare.breakdown.surge == 1.5
 
@@ -193,6 +196,46 @@ class TestFareSummary:
         assert summary["total_fare"] == 135.0
 
 
+class TestBatchFareTotals:
+    """Test batch fare total calculation"""
+    
+    def test_estimated_totals_match_scalar_calculation(self):
+        """Test batch totals equal calculate_estimated_fare for both pricing tiers"""
+        distances = [0.0, 5.0, 25.0, 30.0, 3.333]
+        surges = [1.0, 2.0, 1.0, 1.5, 1.0]
+        
+        totals = calculate_estimated_fare_totals(distances, surges)
+        
+        assert totals == [
+            calculate_estimated_fare(distance_km=d, surge_multiplier=s).total_fare
+            for d, s in zip(distances, surges)
+        ]
+        # 30 + 25 * 12 + 5 * 10 = 380, with 1.5x surge = 570
+        assert totals[3] == 570.0
+    
+    def test_parcel_totals_match_scalar_calculation(self):
+        """Test batch parcel totals equal calculate_parcel_fare"""
+        distances = [5.0, 10.0, 2.5]
+        sizes = ["small", "medium", "large"]
+        
+        totals = calculate_parcel_fare_totals(distances, sizes)
+        
+        assert totals == [
+            calculate_parcel_fare(distance_km=d, parcel_size=size).total_fare
+            for d, size in zip(distances, sizes)
+        ]
+    
+    def test_parcel_totals_invalid_size(self):
+        """Test that batch parcel totals reject invalid sizes"""
+        with pytest.raises(ValueError):
+            calculate_parcel_fare_totals([5.0], ["huge"])
+    
+    def test_mismatched_lengths_rejected(self):
+        """Test that batch inputs of different lengths are rejected"""
+        with pytest.raises(ValueError):
+            calculate_estimated_fare_totals([5.0, 10.0], [1.0])
+
+
 class TestEdgeCases:
     """Test edge cases and boundary conditions"""
     
@@ -148,7 +148,35 @@ class TestDriverLocationUpdate:
             
             assert response.status_code == 400
             assert "outside Indore service area" in response.json()["detail"]
-        
+
+        # Clean up
+        app.dependency_overrides.clear()
+
+    def test_update_location_invalid_body(self):
+        """Test that invalid location bodies are rejected with body error locations."""
+        # Override authentication
+        async def override_get_current_user():
+            return {
+                "user_id": "driver123",
+                "user_type": "driver",
+                "email": "driver@test.com"
+            }
+
+        app.dependency_overrides[get_current_user] = override_get_current_user
+
+        client = TestClient(app)
+        response = client.post(
+            "/api/location/driver",
+            json={
+                "latitude": 22.7196,
+                "longitude": 75.8577,
+                "status": "sleeping"
+            }
+        )
+
+        assert response.status_code == 422
+        assert response.json()["details"][0]["loc"] == ["body", "status"]
+
         # Clean up
         app.dependency_overrides.clear()
 
@@ -127,6 +127,22 @@ class TestLocation:
         )
         
         assert location.city == "Indore"
+    
+    def test_location_from_document(self):
+        """Test building a location from a stored document."""
+        original = Location.from_lat_lon(
+            user_id="driver123",
+            user_type="driver",
+            latitude=22.7196,
+            longitude=75.8577,
+            status="available"
+        )
+        
+        location = Location.from_document(original.to_dict())
+        
+        assert location == original
+        assert location.get_latitude() == 22.7196
+        assert location.get_longitude() == 75.8577
 
 
 class TestLocationHistory:
@@ -4,6 +4,7 @@ Tests the Haversine formula implementation for calculating distances between coo
 
 Requirements: 5.1, 5.2
 """
+import asyncio
 import pytest
 import math
 from app.services.location_service import LocationService
@@ -362,10 +363,124 @@ class TestDistanceCalculationProperties:
         check_hemisphere_consistency()
 
 
+class TestServiceAreaDistance:
+    """Unit tests for the distance used by service area checks."""
+    
+    @pytest.fixture
+    def location_service(self):
+        """Create a LocationService instance for testing (without DB)."""
+        from unittest.mock import MagicMock
+        mock_db = MagicMock()
+        return LocationService(db=mock_db)
+    
+    def test_distance_from_center_matches_haversine(self, location_service):
+        """Reported distance from center stays within 10m of the Haversine distance."""
+        center_lat = LocationService.CITY_CENTER_LAT
+        center_lon = LocationService.CITY_CENTER_LON
+        
+        for bearing_deg in range(0, 360, 15):
+            bearing = math.radians(bearing_deg)
+            latitude = center_lat + 0.18 * math.cos(bearing)
+            longitude = center_lon + 0.19 * math.sin(bearing)
+            
+            result = location_service.validate_location_boundaries(latitude, longitude)
+            haversine = location_service.calculate_distance(
+                center_lat, center_lon, latitude, longitude
+            )
+            
+            assert abs(result["distance_from_center_km"] - haversine) < 0.01
+    
+    def test_service_area_radius(self, location_service):
+        """Points clearly inside or outside the 20km radius are classified correctly."""
+        # About 19.5km and 20.5km north of the city center
+        assert location_service.is_within_service_area(22.7196 + 0.1754, 75.8577) is True
+        assert location_service.is_within_service_area(22.7196 + 0.1844, 75.8577) is False
+
+    def test_validate_locations_bulk_matches_single_validation(self, location_service):
+        """Bulk validation agrees with validate_location_boundaries for each location."""
+        latitudes = [22.7196, 22.65, 22.85, 22.9, 28.6139]
+        longitudes = [75.8577, 75.75, 75.95, 75.8, 77.2090]
+        
+        distances, in_service, in_extended = location_service.validate_locations_bulk(
+            latitudes, longitudes
+        )
+        
+        for i, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+            result = location_service.validate_location_boundaries(latitude, longitude)
+            assert distances[i] == result["distance_from_center_km"]
+            assert in_service[i] == result["in_service_area"]
+            assert in_extended[i] == result["in_extended_area"]
+        
+        # City center is in the service area but not in the extended area
+        assert in_service[0] is True and in_extended[0] is False
+        # Delhi is outside the service area
+        assert in_service[4] is False
+
+
+
+class TestResponseCache:
+    """Unit tests for the external API response cache."""
+    
+    def test_evicts_oldest_entry_when_full(self):
+        """The oldest entry is dropped once maxsize is reached."""
+        from app.services.location_service import ResponseCache
+        
+        cache = ResponseCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+    
+    def test_expired_entries_are_not_returned(self, monkeypatch):
+        """Entries older than the TTL are treated as absent."""
+        from app.services import location_service as module
+        
+        cache = module.ResponseCache(maxsize=2, ttl_seconds=60)
+        monkeypatch.setattr(module.time, "monotonic", lambda: 1000.0)
+        cache.set("a", 1)
+        
+        monkeypatch.setattr(module.time, "monotonic", lambda: 1061.0)
+        assert cache.get("a") is None
+
+
+class TestGeohash:
+    """Unit tests for geohash cell encoding."""
+    
+    def test_geohash6_known_values(self):
+        """Encoding matches published geohash values."""
+        from app.services.location_service import _geohash6
+        
+        assert _geohash6(57.64911, 10.40744) == "u4pruy"
+        assert _geohash6(-90.0, -180.0) == "000000"
+        assert _geohash6(90.0, 180.0) == "zzzzzz"
+    
+    def test_geohash6_neighbors(self):
+        """A ring of one covers the center cell and its 8 neighbours."""
+        from app.services.location_service import _geohash6, _geohash6_neighbors
+        
+        cells = _geohash6_neighbors(22.7196, 75.8577)
+        
+        assert cells[0] == _geohash6(22.7196, 75.8577)
+        assert len(set(cells)) == 9
+        assert _geohash6(22.7196 + 0.005, 75.8577 - 0.01) in cells
+
 
 class TestGoogleMapsIntegration:
     """Unit tests for Google Maps API integration."""
     
+    @pytest.fixture(autouse=True)
+    def clear_maps_caches(self):
+        """Keep cached responses from one test out of the next."""
+        from app.services.location_service import directions_cache, geocode_cache
+        geocode_cache.clear()
+        directions_cache.clear()
+        yield
+        geocode_cache.clear()
+        directions_cache.clear()
+    
     @pytest.fixture
     def location_service(self):
         """Create a LocationService instance for testing."""
@@ -390,7 +505,7 @@ class TestGoogleMapsIntegration:
         service.gmaps_client = None  # Force no API key
         
         with pytest.raises(ValueError, match="Google Maps API key not configured"):
-            service.search_address("Rajwada")
+            asyncio.run(service.search_address("Rajwada"))
     
     def test_search_address_adds_indore_to_query(self, location_service, monkeypatch):
         """Test that search_address adds 'Indore' to query if not present."""
@@ -401,7 +516,7 @@ class TestGoogleMapsIntegration:
         mock_geocode = MagicMock(return_value=[])
         monkeypatch.setattr(location_service.gmaps_client, "geocode", mock_geocode)
         
-        location_service.search_address("Rajwada")
+        asyncio.run(location_service.search_address("Rajwada"))
         
         # Check that "Indore" was added to the query
         call_args = mock_geocode.call_args
@@ -434,7 +549,7 @@ class TestGoogleMapsIntegration:
         mock_geocode = MagicMock(return_value=mock_results)
         monkeypatch.setattr(location_service.gmaps_client, "geocode", mock_geocode)
         
-        results = location_service.search_address("test")
+        results = asyncio.run(location_service.search_address("test"))
         
         # Should only return locations within service area
         assert len(results) == 2
@@ -461,7 +576,7 @@ class TestGoogleMapsIntegration:
         mock_geocode = MagicMock(return_value=mock_results)
         monkeypatch.setattr(location_service.gmaps_client, "geocode", mock_geocode)
         
-        results = location_service.search_address("test", limit=3)
+        results = asyncio.run(location_service.search_address("test", limit=3))
         
         # Should return at most 3 results
         assert len(results) <= 3
@@ -482,7 +597,7 @@ class TestGoogleMapsIntegration:
         mock_geocode = MagicMock(return_value=mock_results)
         monkeypatch.setattr(location_service.gmaps_client, "geocode", mock_geocode)
         
-        results = location_service.search_address("test")
+        results = asyncio.run(location_service.search_address("test"))
         
         assert len(results) == 1
         result = results[0]
@@ -508,7 +623,7 @@ class TestGoogleMapsIntegration:
         mock_geocode = MagicMock(side_effect=Exception("API Error"))
         monkeypatch.setattr(location_service.gmaps_client, "geocode", mock_geocode)
         
-        results = location_service.search_address("test")
+        results = asyncio.run(location_service.search_address("test"))
         
         # Should return empty list on error
         assert results == []
@@ -521,7 +636,7 @@ class TestGoogleMapsIntegration:
         service.gmaps_client = None  # Force no API key
         
         with pytest.raises(ValueError, match="Google Maps API key not configured"):
-            service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+            asyncio.run(service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
     
     def test_calculate_route_returns_correct_structure(self, location_service, monkeypatch):
         """Test that calculate_route returns correctly structured result."""
@@ -560,7 +675,7 @@ class TestGoogleMapsIntegration:
         mock_directions_method = MagicMock(return_value=mock_directions)
         monkeypatch.setattr(location_service.gmaps_client, "directions", mock_directions_method)
         
-        result = location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+        result = asyncio.run(location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
         
         # Check structure
         assert result is not None
@@ -591,7 +706,7 @@ class TestGoogleMapsIntegration:
         mock_directions_method = MagicMock(return_value=[])
         monkeypatch.setattr(location_service.gmaps_client, "directions", mock_directions_method)
         
-        result = location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+        result = asyncio.run(location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
         
         # Should return None when no route found
         assert result is None
@@ -605,7 +720,7 @@ class TestGoogleMapsIntegration:
         mock_directions_method = MagicMock(side_effect=Exception("API Error"))
         monkeypatch.setattr(location_service.gmaps_client, "directions", mock_directions_method)
         
-        result = location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+        result = asyncio.run(location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
         
         # Should return None on error
         assert result is None
@@ -643,7 +758,7 @@ class TestGoogleMapsIntegration:
         mock_directions_method = MagicMock(return_value=mock_directions)
         monkeypatch.setattr(location_service.gmaps_client, "directions", mock_directions_method)
         
-        result = location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+        result = asyncio.run(location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
         
         # Should have 4 steps + 1 final destination = 5 waypoints
         assert len(result["waypoints"]) == 5
@@ -684,7 +799,7 @@ class TestGoogleMapsIntegration:
         mock_directions_method = MagicMock(return_value=mock_directions)
         monkeypatch.setattr(location_service.gmaps_client, "directions", mock_directions_method)
         
-        result = location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+        result = asyncio.run(location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
         
         # Should be rounded to 2 decimal places
         assert result["distance_km"] == 5.68
@@ -717,7 +832,7 @@ class TestGoogleMapsIntegration:
         mock_directions_method = MagicMock(return_value=mock_directions)
         monkeypatch.setattr(location_service.gmaps_client, "directions", mock_directions_method)
         
-        result = location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937)
+        result = asyncio.run(location_service.calculate_route(22.7196, 75.8577, 22.7532, 75.8937))
         
         # Should be converted to minutes and truncated to int
         assert result["duration_minutes"] == 12
@@ -833,6 +948,24 @@ class TestRouteDeviationDetection:
         assert result["closest_waypoint"]["longitude"] == 75.8800
         assert result["is_deviated"] is False
     
+    def test_deviation_measured_to_route_segment(self, location_service):
+        """Test that a location beside a long segment is measured to the segment."""
+        # Two waypoints about 4.4km apart on a north-south road
+        route_waypoints = [
+            {"latitude": 22.7000, "longitude": 75.8577},
+            {"latitude": 22.7400, "longitude": 75.8577}
+        ]
+        
+        # About 200m east of the road, halfway between the waypoints
+        current_lat, current_lng = 22.7200, 75.8577 + 0.00195
+        
+        result = location_service.detect_route_deviation(
+            current_lat, current_lng, route_waypoints, threshold_meters=500.0
+        )
+        
+        assert result["is_deviated"] is False
+        assert abs(result["deviation_distance_meters"] - 200.0) < 5.0
+    
     def test_deviation_with_empty_waypoints(self, location_service):
         """Test that empty waypoints list returns no deviation."""
         route_waypoints = []
@@ -302,6 +302,9 @@ def test_cancel_broadcast(db_session, redis_client):
     broadcast_details = matching_service.get_broadcast_details("ride123")
     assert broadcast_details["status"] == "cancelled"
     assert "cancelled_at" in broadcast_details
+    
+    # Verify the driver's notification for this ride is removed
+    assert not redis_client.hexists("driver:ride_notifications:driver1", "ride123")
 
 
 def test_broadcast_with_no_available_drivers(db_session, redis_client):
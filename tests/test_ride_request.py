@@ -152,10 +152,10 @@ class TestRideRequestCreation:
         assert response.fare_breakdown.surge == 1.0
         
         # Verify locations
-        assert response.pickup_location["latitude"] == 22.7196
-        assert response.pickup_location["longitude"] == 75.8577
-        assert response.destination["latitude"] == 22.7520
-        assert response.destination["longitude"] == 75.8937
+        assert response.pickup_location.latitude == 22.7196
+        assert response.pickup_location.longitude == 75.8577
+        assert response.destination.latitude == 22.7520
+        assert response.destination.longitude == 75.8937
         
         # Verify database operations
         mock_db.add.assert_called_once()
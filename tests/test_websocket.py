@@ -90,6 +90,38 @@ def test_websocket_ping_pong(rider_token):
         assert response["data"]["timestamp"] == "2024-01-01T00:00:00Z"
 
 
+def test_websocket_invalid_json(rider_token):
+    """Test malformed JSON is reported without closing the connection."""
+    token, user_id = rider_token
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/ws?token={token}") as websocket:
+        websocket.receive_json()
+
+        websocket.send_text("{not json")
+        response = websocket.receive_json()
+        assert response["type"] == "error"
+        assert response["data"]["message"] == "Invalid JSON format"
+
+        # Connection is still usable
+        websocket.send_json({"type": "ping", "data": {}})
+        assert websocket.receive_json()["type"] == "pong"
+
+
+def test_websocket_invalid_message_envelope(rider_token):
+    """Test a JSON payload that is not a message object is rejected."""
+    token, user_id = rider_token
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/ws?token={token}") as websocket:
+        websocket.receive_json()
+
+        websocket.send_text("[1, 2, 3]")
+        response = websocket.receive_json()
+        assert response["type"] == "error"
+        assert response["data"]["message"] == "Invalid message format"
+
+
 def test_connection_manager_connect(connection_manager):
     """Test connection manager connect functionality."""
     from unittest.mock import AsyncMock, MagicMock
@@ -185,6 +217,34 @@ def test_connection_manager_send_personal_message(connection_manager):
     websocket.send_json.assert_called_once_with(message)
 
 
+def test_connection_manager_send_personal_message_msgpack(connection_manager):
+    """Test messages use MessagePack framing when it was negotiated."""
+    from unittest.mock import AsyncMock
+    import msgpack
+    from app.services.websocket_service import MSGPACK_SUBPROTOCOL
+    
+    websocket = AsyncMock()
+    
+    user_id = str(uuid4())
+    
+    import asyncio
+    
+    asyncio.run(connection_manager.connect(websocket, user_id, "driver", MSGPACK_SUBPROTOCOL))
+    websocket.accept.assert_called_once_with(subprotocol=MSGPACK_SUBPROTOCOL)
+    assert connection_manager.uses_msgpack(user_id)
+    
+    message = {"type": "test", "data": {"latitude": 22.7196}}
+    result = asyncio.run(connection_manager.send_personal_message(message, user_id))
+    
+    assert result is True
+    websocket.send_json.assert_not_called()
+    sent = websocket.send_bytes.call_args[0][0]
+    assert msgpack.unpackb(sent, raw=False) == message
+    
+    connection_manager.disconnect(user_id)
+    assert not connection_manager.uses_msgpack(user_id)
+
+
 def test_connection_manager_send_to_disconnected_user(connection_manager):
     """Test sending message to disconnected user fails gracefully."""
     import asyncio
@@ -243,6 +303,117 @@ def test_connection_manager_broadcast_to_specific_drivers(connection_manager):
     assert count == 2
 
 
+def test_connection_manager_send_to_many_encodes_once(connection_manager):
+    """Test sending one message to several users with pre-encoded frames."""
+    from unittest.mock import AsyncMock, patch
+    import json
+    
+    import asyncio
+    
+    driver_ids = [str(uuid4()) for _ in range(3)]
+    websockets = []
+    
+    for driver_id in driver_ids:
+        websocket = AsyncMock()
+        websockets.append(websocket)
+        asyncio.run(connection_manager.connect(websocket, driver_id, "driver"))
+    
+    message = {"type": "ride_no_longer_available", "data": {"ride_id": "123"}}
+    
+    with patch("app.services.websocket_service.json.dumps", wraps=json.dumps) as mock_dumps:
+        count = asyncio.run(connection_manager.send_to_many(message, driver_ids + ["offline"]))
+    
+    assert count == 3
+    assert mock_dumps.call_count == 1
+    for websocket in websockets:
+        sent = websocket.send_text.call_args[0][0]
+        assert json.loads(sent) == message
+
+
+def test_connection_manager_relay_between_workers():
+    """Test messages reach users connected to another worker via Redis."""
+    from unittest.mock import AsyncMock, patch
+    import fakeredis
+    from fakeredis import aioredis as fake_aioredis
+    from app.services import websocket_service
+    
+    import asyncio
+    
+    server = fakeredis.FakeServer()
+    
+    def fake_from_url(url, **kwargs):
+        return fake_aioredis.FakeRedis(server=server, **kwargs)
+    
+    async def scenario():
+        worker_a = ConnectionManager()
+        worker_b = ConnectionManager()
+        await worker_a.start_relay("redis://localhost")
+        await worker_b.start_relay("redis://localhost")
+        
+        websocket = AsyncMock()
+        await worker_b.connect(websocket, "rider_1", "rider")
+        
+        message = {"type": "ride_matched", "data": {"ride_id": "123"}}
+        result = await worker_a.send_personal_message(message, "rider_1")
+        
+        # Give worker B's listener a chance to deliver
+        for _ in range(50):
+            if websocket.send_json.called:
+                break
+            await asyncio.sleep(0.01)
+        
+        await worker_a.stop_relay()
+        await worker_b.stop_relay()
+        return result, websocket, message
+    
+    with patch.object(websocket_service.aioredis, "from_url", side_effect=fake_from_url):
+        result, websocket, message = asyncio.run(scenario())
+    
+    assert result is True
+    websocket.send_json.assert_called_once_with(message)
+
+
+def test_connection_manager_relay_to_offline_user():
+    """Test relaying to a user connected to no worker reports failure."""
+    from unittest.mock import AsyncMock, patch
+    import fakeredis
+    from fakeredis import aioredis as fake_aioredis
+    from app.services import websocket_service
+    
+    import asyncio
+    
+    server = fakeredis.FakeServer()
+    
+    def fake_from_url(url, **kwargs):
+        return fake_aioredis.FakeRedis(server=server, **kwargs)
+    
+    async def scenario():
+        worker_a = ConnectionManager()
+        worker_b = ConnectionManager()
+        await worker_a.start_relay("redis://localhost")
+        await worker_b.start_relay("redis://localhost")
+        
+        # Connect and disconnect on worker B so its relay unsubscribes
+        await worker_b.connect(AsyncMock(), "rider_1", "rider")
+        worker_b.disconnect("rider_1")
+        await asyncio.sleep(0.05)
+        
+        message = {"type": "ride_matched", "data": {"ride_id": "123"}}
+        results = (
+            await worker_a.send_personal_message(message, "rider_1"),
+            await worker_a.send_personal_message(message, "rider_2")
+        )
+        
+        await worker_a.stop_relay()
+        await worker_b.stop_relay()
+        return results
+    
+    with patch.object(websocket_service.aioredis, "from_url", side_effect=fake_from_url):
+        results = asyncio.run(scenario())
+    
+    assert results == (False, False)
+
+
 def test_connection_manager_get_connection_count(connection_manager):
     """Test getting connection statistics."""
     from unittest.mock import AsyncMock